@@ -0,0 +1,250 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Given a SAT solver, its parameters, a tuned PCS (e.g. final_best.pcs) and
+# CNFs, find which changes of the tuned point really matter via ablation.
+# Starting from the default point, on each step all remaining single-parameter
+# flips toward the tuned point are evaluated in parallel, and the best flip is
+# applied, so the greedy path ends at the tuned point.
+# All (point, CNF, seed) runs of a step are processed by a pool, so all cores
+# are used. Results of runs are cached in a JSONL file, so a repeated or
+# interrupted ablation does not rerun them. A cached run is reused only with
+# the same solver and -maxsolvertime. Unsolved (timed out or failed) runs get
+# the penalty of the tuner as runtime: PAR2 of the time limit, or without it,
+# twice the worst solved runtime of the default and tuned points.
+# The contribution of each flip to the sum time is written to ablation.txt,
+# while the shortest prefix of the path which keeps -keep of the total gain
+# is written to ablation_best.pcs.
+#
+# Example:
+#   python3 ./ablation.py ./kissat3 ./kissat3.pcs ./final_best.pcs ./cnfs/ -cpunum=8 -maxsolvertime=300
+#==============================================================================
+
+script_name = "ablation.py"
+version = '0.0.3'
+
+import sys
+import os
+import json
+
+from bbo_param_solver import read_pcs, read_cnfs, make_pool, EventLog, \
+  calc_validation_run, write_final_pcs, unsolved_penalty, SOLVED_RUN_STATUSES
+
+# Input options:
+class Options:
+  cpu_num = 1
+  max_solver_time = -1
+  reps = 1
+  keep = 0.9
+  cache_file = 'ablation_cache.jsonl'
+  def __init__(self):
+    self.cpu_num = 1
+    self.max_solver_time = -1
+    self.reps = 1
+    self.keep = 0.9
+    self.cache_file = 'ablation_cache.jsonl'
+  def __str__(self):
+    s = 'cpu_num         : ' + str(self.cpu_num) + '\n' +\
+    'max_solver_time : ' + str(self.max_solver_time) + '\n' +\
+    'reps            : ' + str(self.reps) + '\n' +\
+    'keep            : ' + str(self.keep) + '\n' +\
+    'cache_file      : ' + self.cache_file
+    return s
+  def read(self, argv) :
+    for p in argv:
+      if '-cpunum=' in p:
+        self.cpu_num = int(p.split('-cpunum=')[1])
+      if '-maxsolvertime=' in p:
+        self.max_solver_time = int(p.split('-maxsolvertime=')[1])
+      if '-reps=' in p:
+        self.reps = int(p.split('-reps=')[1])
+      if '-keep=' in p:
+        self.keep = float(p.split('-keep=')[1])
+      if '-cache=' in p:
+        self.cache_file = p.split('-cache=')[1]
+    assert(self.cpu_num > 0 and self.reps > 0)
+    assert(self.keep > 0 and self.keep <= 1)
+
+def print_usage():
+  print('Usage : ' + script_name + ' solver solver-parameters tuned-parameters cnfs-folder [Options]')
+  print('  Options :\n' +\
+  '  -cpunum=<int>         - (default : 1)   number of used CPU cores' + '\n' +\
+  '  -maxsolvertime=<int>  - (default : -1)  maximum SAT solver runtime' + '\n' +\
+  '  -reps=<int>           - (default : 1)   runs with different solver seeds per point and CNF' + '\n' +\
+  '  -keep=<float>         - (default : 0.9) share of the total gain kept by ablation_best.pcs' + '\n' +\
+  '  -cache=<str>          - (default : ablation_cache.jsonl) cache of solver runs')
+
+# Key of a cached solver run. Runs of another solver or with another time
+# limit are not reused:
+def run_key(solver_name : str, max_solver_time : int, point : list, cnf : str, rep : int):
+  return (os.path.abspath(solver_name), max_solver_time, tuple(point), cnf, rep)
+
+# Cached solver runs, the key is given by run_key(). Runs cached by the
+# version 0.0.1 have neither the solver nor the time limit, so they are skipped:
+def read_cache(file_name : str):
+  cache = dict()
+  if not os.path.isfile(file_name):
+    return cache
+  with open(file_name, 'r') as f:
+    for line in f:
+      try:
+        event = json.loads(line)
+      except json.JSONDecodeError:
+        continue
+      if event['event'] != 'run' or 'solver' not in event or 'cap' not in event:
+        continue
+      cache[run_key(event['solver'], event['cap'], event['point'], event['cnf'], \
+        event['rep'])] = (event['runtime'], event['solved'])
+  return cache
+
+# Process runs of given points on CNFs which are not in the cache in parallel.
+# Returns (runtime, is_solved) of all runs of the points:
+def run_points(pool, solver_name : str, params : list, points : list, \
+  cnfs : list, cache : dict, cache_log : EventLog, op : Options):
+  tasks = []
+  for i in range(len(points)):
+    for cnf in cnfs:
+      for rep in range(op.reps):
+        if run_key(solver_name, op.max_solver_time, points[i], cnf, rep) not in cache:
+          tasks.append((solver_name, params, i, points[i], cnf, rep, \
+            op.max_solver_time, '', 0))
+  if len(tasks) > 0:
+    print(str(len(tasks)) + ' solver runs on ' + str(op.cpu_num) + ' CPU cores')
+  # Measured runtimes are cached, the penalty is given to unsolved runs only
+  # in sums:
+  for i, cnf, rep, t, status in pool.starmap(calc_validation_run, tasks):
+    is_solved = status in SOLVED_RUN_STATUSES
+    cache[run_key(solver_name, op.max_solver_time, points[i], cnf, rep)] = (t, is_solved)
+    cache_log.write({'event' : 'run', 'solver' : os.path.abspath(solver_name), \
+      'cap' : op.max_solver_time, 'point' : points[i], 'cnf' : cnf, 'rep' : rep, \
+      'runtime' : t, 'solved' : is_solved})
+  cache_log.flush()
+  return [cache[run_key(solver_name, op.max_solver_time, p, cnf, rep)] \
+    for p in points for cnf in cnfs for rep in range(op.reps)]
+
+# Sum times of given points on CNFs, where runtimes are averaged over seeds
+# and unsolved runs get the penalty. All runs must be in the cache:
+def sum_times(solver_name : str, points : list, cnfs : list, cache : dict, \
+  penalty : float, op : Options):
+  res = []
+  for p in points:
+    sum_time = 0.0
+    for cnf in cnfs:
+      for rep in range(op.reps):
+        t, is_solved = cache[run_key(solver_name, op.max_solver_time, p, cnf, rep)]
+        sum_time += (t if is_solved else penalty) / op.reps
+    res.append(sum_time)
+  return res
+
+if __name__ == '__main__':
+  if len(sys.argv) < 5 or sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  solver_name = sys.argv[1]
+  param_file_name = sys.argv[2]
+  tuned_file_name = sys.argv[3]
+  cnfs_folder_name = sys.argv[4]
+  op = Options()
+  op.read(sys.argv[5:])
+  print(op)
+
+  params = read_pcs(param_file_name)
+  tuned_values = {prm.name : prm.default for prm in read_pcs(tuned_file_name)}
+  def_point = [prm.default for prm in params]
+  tuned_point = [tuned_values[prm.name] if prm.name in tuned_values else prm.default \
+    for prm in params]
+  changed = [i for i in range(len(params)) if def_point[i] != tuned_point[i]]
+  print(str(len(changed)) + ' out of ' + str(len(params)) + \
+    ' parameters differ between the default and the tuned points')
+  assert(len(changed) > 0)
+  cnfs = sorted(read_cnfs(cnfs_folder_name))
+  assert(len(cnfs) > 0)
+  print(str(len(cnfs)) + ' CNFs were read')
+
+  cache = read_cache(op.cache_file)
+  print(str(len(cache)) + ' cached solver runs')
+  cache_log = EventLog(op.cache_file, 'ablation-' + str(os.getpid()), 0)
+
+  # Greedy path from the default point toward the tuned one:
+  path = []
+  with make_pool(op.cpu_num, []) as pool:
+    # The penalty is fixed by runs of the default and tuned points, so sums
+    # of all steps are comparable:
+    runs = run_points(pool, solver_name, params, [def_point, tuned_point], \
+      cnfs, cache, cache_log, op)
+    penalty = unsolved_penalty(op.max_solver_time, runs)
+    print('Runtime of an unsolved run : ' + str(round(penalty, 2)))
+    def_sum_time, tuned_sum_time = sum_times(solver_name, [def_point, tuned_point], \
+      cnfs, cache, penalty, op)
+    print('Default sum time : ' + str(round(def_sum_time, 2)))
+    print('Tuned sum time   : ' + str(round(tuned_sum_time, 2)))
+    cur_point = list(def_point)
+    cur_sum_time = def_sum_time
+    remaining = list(changed)
+    while len(remaining) > 0:
+      candidates = []
+      for i in remaining:
+        p = list(cur_point)
+        p[i] = tuned_point[i]
+        candidates.append(p)
+      run_points(pool, solver_name, params, candidates, cnfs, cache, cache_log, op)
+      cand_sum_times = sum_times(solver_name, candidates, cnfs, cache, penalty, op)
+      k = min(range(len(remaining)), key=lambda k: cand_sum_times[k])
+      i = remaining[k]
+      path.append((i, cur_sum_time - cand_sum_times[k], cand_sum_times[k]))
+      print('Step ' + str(len(path)) + ' : ' + params[i].name + ' ' + \
+        str(def_point[i]) + ' -> ' + str(tuned_point[i]) + ', sum time ' + \
+        str(round(cand_sum_times[k], 2)))
+      cur_point = candidates[k]
+      cur_sum_time = cand_sum_times[k]
+      remaining.remove(i)
+  cache_log.close()
+
+  # The shortest prefix of the path which keeps the given share of the gain:
+  total_gain = def_sum_time - cur_sum_time
+  prefix_len = len(path)
+  if total_gain > 0:
+    for m in range(len(path) + 1):
+      path_sum_time = path[m-1][2] if m > 0 else def_sum_time
+      if def_sum_time - path_sum_time >= op.keep * total_gain:
+        prefix_len = m
+        break
+  else:
+    prefix_len = 0
+  minimal_point = list(def_point)
+  for i, _, _ in path[:prefix_len]:
+    minimal_point[i] = tuned_point[i]
+
+  lines = []
+  lines.append('Runtime of an unsolved run : ' + str(round(penalty, 2)))
+  lines.append('Default sum time : ' + str(round(def_sum_time, 2)))
+  lines.append('Tuned sum time   : ' + str(round(tuned_sum_time, 2)))
+  lines.append('')
+  lines.append('%-5s %-30s %-24s %-12s %-12s %s' % ('step', 'parameter', 'change', \
+    'gain', 'share', 'sum time'))
+  for step, (i, gain, path_sum_time) in enumerate(path):
+    share = gain / total_gain if total_gain > 0 else 0.0
+    lines.append('%-5s %-30s %-24s %-12s %-12s %s' % (str(step + 1), params[i].name, \
+      str(def_point[i]) + ' -> ' + str(tuned_point[i]), str(round(gain, 2)), \
+      str(round(share, 3)), str(round(path_sum_time, 2))))
+  lines.append('')
+  if total_gain > 0:
+    lines.append('First ' + str(prefix_len) + ' out of ' + str(len(path)) + \
+      ' changes keep at least ' + str(op.keep) + ' of the total gain ' + \
+      str(round(total_gain, 2)))
+  else:
+    lines.append('The tuned point is not better than the default one on these CNFs')
+  report_name = 'ablation.txt'
+  print('')
+  for line in lines:
+    print(line)
+  print('Writing ablation report to file ' + report_name)
+  with open(report_name, 'w') as f:
+    for line in lines:
+      f.write(line + '\n')
+  minimal_pcs_name = 'ablation_best.pcs'
+  print('Writing minimal point to file ' + minimal_pcs_name)
+  write_final_pcs(minimal_point, params, cnfs, minimal_pcs_name)
@@ -10,7 +10,7 @@
 # 
 # By default the script works in the estimating mode, where new points are generated
 # and processed until a stopping criterion is reached.
-# In the solving mode, cpu_num points are generated and processed until on any of them
+# In the solving mode, a diverse portfolio of points is processed until on any of them
 # a solution is found.
 #========================================================================================
 #
@@ -19,7 +19,7 @@
 # 1. sktop - deal with UNFINISHED when more than 1 thread
 
 script_name = "bbo_param_solver.py"
-version = '0.11.6'
+version = '0.25.0'
 
 import sys
 import glob
@@ -29,24 +29,92 @@ import random
 import copy
 import math
 import string
+import tempfile
+import json
+import shutil
+import hashlib
+import fcntl
+import gzip
+import bz2
+import lzma
+import queue
+import asyncio
+import threading
+import functools
+import http.server
+import concurrent.futures
+from collections import Counter
 from enum import Enum
 from datetime import datetime
 import multiprocessing as mp
-import numpy as np
-from skopt import Optimizer
-from skopt.space import Categorical
 
 # A new best point must be at least 1% better than the current best point:
 COEF_NEW_BEST_POINT = 0.99
+# In the robust acceptance mode, relative noise of runtimes on a CNF before
+# repeated measurements are available:
+PRIOR_RUNTIME_NOISE = 0.05
+# In the solving mode, a new point of the portfolio is the farthest one of
+# these random candidates:
+DIVERSITY_CANDIDATES = 100
+# In the solving mode, the best points from a past run's history taken per core:
+PORTFOLIO_POINTS_PER_CORE = 4
+# In the adaptive mutation mode, the expected number of changed parameters is
+# multiplied by this factor after a success and divided by its 4th root after
+# a failure (1/5 success rule):
+MUTATION_ADAPT_FACTOR = 1.5
+# The neighbourhood of the best point is considered exhausted after so many
+# repeated (1+1) points in a row:
+MAX_DUPLICATES_IN_ROW = 100
+# Number of the best local optima kept for restarts of (1+1):
+ELITE_SIZE = 10
+# In the robust acceptance mode, a point whose re-measurements failed so many
+# times is not re-measured anymore:
+MAX_REMEASURE_FAILURES = 3
+# Runs of the calibration workload at the start, and the latest runs whose
+# median defines the machine's speed:
+CALIB_WINDOW = 3
+# Seconds between snapshots of live metrics:
+METRICS_INTERVAL = 5
+# Environment variables set by multi_study.py for its tuners: the scheduler's
+# authentication key (hex) and the name of the study:
+SCHEDULER_KEY_ENV = 'BBO_SCHEDULER_KEY'
+SCHEDULER_STUDY_ENV = 'BBO_STUDY'
+# In the cost-aware mode, the minimal cost of an evaluation in seconds:
+MIN_EVAL_COST = 0.01
 
 skt_opt = None
 
+# Compressed CNFs are decompressed once to a staging folder:
+cnf_openers = {
+    ".xz" : lzma.open,
+    ".lzma" : lzma.open,
+    ".gz" : gzip.open,
+    ".bz2" : bz2.open
+}
+# A staged CNF used within these seconds is not evicted, since a solver might
+# be about to open it:
+STAGING_GRACE_SEC = 10
+
+# Lock files of CPUs claimed by tuners with worker binding:
+CPU_LOCKS_DIR = os.path.join(tempfile.gettempdir(), 'bbo_cpu_locks')
+# Descriptors of the claimed lock files, kept open while the tuner runs:
+claimed_cpu_locks = []
+
+# Objectives and solver's options which limit them. Counters of the solver's
+# statistics are deterministic, unlike the process time:
+objective_limit_options = {
+    "time" : "--time=",
+    "conflicts" : "--conflicts=",
+    "decisions" : "--decisions="
+}
+
 optalg_indices = {
     "1+1" : 0,
     "GP" : 1, 
     "RF" : 2, 
     "ET" : 3, 
-    "GBRT" : 4
+    "GBRT" : 4,
+    "SH" : 5
 }
 
 class PointStatus(Enum):
@@ -55,6 +123,49 @@ class PointStatus(Enum):
     FINISHED = 2 # a point is calculated on all instances
     INTERRUPTED = 3 # a point is calculated, but at least one instances the SAT solver was interrupted
     UNFINISHED = 4 # a calculation is unfinished because of new best point 
+    FAILED = 5 # the SAT solver failed (crash, memout, malformed output) on at least one instance
+
+# Result of a solver run on an instance:
+class RunStatus(Enum):
+    SAT = 0
+    UNSAT = 1
+    TIMEOUT = 2 # the solver's limit is reached
+    MEMOUT = 3 # the solver ran out of memory
+    CRASH = 4 # the solver was killed by a signal or exited with an unknown code
+    PARSE_ERROR = 5 # the solver exited normally, but its log has no result
+
+# Solved instances, other results make a point interrupted or failed:
+SOLVED_RUN_STATUSES = [RunStatus.SAT, RunStatus.UNSAT]
+# Exit codes of a solver which finished normally (unknown, SAT, UNSAT):
+NORMAL_EXIT_CODES = [0, 10, 20]
+# Signs of running out of memory in a solver's log:
+MEMOUT_MESSAGES = ['out of memory', 'memory limit', 'bad_alloc', 'memoryerror']
+
+# Surrogate-based optimizer of skopt. skopt (and numpy with it) is imported
+# only here, since (1+1) does not need it and its import is slow:
+def make_skopt_optimizer(estimator_type : str, params : list, \
+  is_cost_aware : bool, seed : int):
+  from skopt import Optimizer
+  from skopt.space import Categorical
+  skt_opt_space = [Categorical(param.values, name=param.name) for param in params]
+  print('sktopt estimator type : ' + estimator_type)
+  if is_cost_aware:
+    # Gradients of EIps are not available in categorical spaces:
+    print('sktopt acquisition function : EIps')
+    return Optimizer(skt_opt_space, base_estimator=estimator_type, n_initial_points=10, \
+      acq_func='EIps', acq_optimizer='sampling', random_state=seed)
+  return Optimizer(skt_opt_space, base_estimator=estimator_type, n_initial_points=10, \
+    random_state=seed)
+
+# Optimizer backends by the sampler's name, each one is constructed (and its
+# modules are imported) only if it is chosen. (1+1) has no model:
+optimizer_backends = {
+    "1+1" : lambda params, is_cost_aware, seed : None,
+    "GP" : functools.partial(make_skopt_optimizer, "GP"),
+    "RF" : functools.partial(make_skopt_optimizer, "RF"),
+    "ET" : functools.partial(make_skopt_optimizer, "ET"),
+    "GBRT" : functools.partial(make_skopt_optimizer, "GBRT")
+}
 
 # Input options:
 class Options:
@@ -67,6 +178,40 @@ class Options:
 	cpu_num = 1
 	seed = 0
 	is_solving = False
+	event_log_file = ''
+	flush_interval = 10
+	profile_interval = -1
+	staging_dir = ''
+	staging_limit = 1024
+	is_validating = False
+	top_k = 3
+	val_reps = 1
+	history_file = ''
+	sh_sampler = "1+1"
+	eta = 3
+	min_fidelity = 1
+	acceptance = "single"
+	acc_reps = 3
+	acc_z = 1.645
+	affinity = "none"
+	is_no_smt = False
+	portfolio_file = ''
+	max_flips = 10
+	backend = "pool"
+	columnar_dir = ''
+	is_cost_aware = False
+	mutation = "fixed"
+	stag_time = -1
+	stag_points = -1
+	kick = 5
+	calib_cnf = ''
+	calib_ref = -1
+	calib_interval = -1
+	objective = "time"
+	metrics_port = -1
+	metrics_file = ''
+	scheduler = ''
+	baseline_reps = 1
 	def __init__(self):
 		self.def_point_time = -1
 		self.max_points = 1000
@@ -75,6 +220,40 @@ class Options:
 		self.cpu_num = 1
 		self.seed = 0
 		self.is_solving = False
+		self.event_log_file = 'generated_points.jsonl'
+		self.flush_interval = 10
+		self.profile_interval = -1
+		self.staging_dir = ''
+		self.staging_limit = 1024
+		self.is_validating = False
+		self.top_k = 3
+		self.val_reps = 1
+		self.history_file = ''
+		self.sh_sampler = "1+1"
+		self.eta = 3
+		self.min_fidelity = 1
+		self.acceptance = "single"
+		self.acc_reps = 3
+		self.acc_z = 1.645
+		self.affinity = "none"
+		self.is_no_smt = False
+		self.portfolio_file = ''
+		self.max_flips = 10
+		self.backend = "pool"
+		self.columnar_dir = ''
+		self.is_cost_aware = False
+		self.mutation = "fixed"
+		self.stag_time = -1
+		self.stag_points = -1
+		self.kick = 5
+		self.calib_cnf = ''
+		self.calib_ref = -1
+		self.calib_interval = -1
+		self.objective = "time"
+		self.metrics_port = -1
+		self.metrics_file = ''
+		self.scheduler = ''
+		self.baseline_reps = 1
 	def __str__(self):
 		s = 'opt_alg         : ' + self.opt_alg + '\n' +\
     'def_point_time  : ' + str(self.def_point_time) + '\n' +\
@@ -83,7 +262,41 @@ class Options:
 		'max_solver_time : ' + str(self.max_solver_time) + '\n' +\
 		'cpu_num         : ' + str(self.cpu_num) + '\n' +\
 		'seed            : ' + str(self.seed) + '\n' +\
-		'is_solving      : ' + str(self.is_solving)
+		'is_solving      : ' + str(self.is_solving) + '\n' +\
+		'event_log_file  : ' + self.event_log_file + '\n' +\
+		'flush_interval  : ' + str(self.flush_interval) + '\n' +\
+		'profile_interval: ' + str(self.profile_interval) + '\n' +\
+		'staging_dir     : ' + self.staging_dir + '\n' +\
+		'staging_limit   : ' + str(self.staging_limit) + '\n' +\
+		'is_validating   : ' + str(self.is_validating) + '\n' +\
+		'top_k           : ' + str(self.top_k) + '\n' +\
+		'val_reps        : ' + str(self.val_reps) + '\n' +\
+		'history_file    : ' + self.history_file + '\n' +\
+		'sh_sampler      : ' + self.sh_sampler + '\n' +\
+		'eta             : ' + str(self.eta) + '\n' +\
+		'min_fidelity    : ' + str(self.min_fidelity) + '\n' +\
+		'acceptance      : ' + self.acceptance + '\n' +\
+		'acc_reps        : ' + str(self.acc_reps) + '\n' +\
+		'acc_z           : ' + str(self.acc_z) + '\n' +\
+		'affinity        : ' + self.affinity + '\n' +\
+		'is_no_smt       : ' + str(self.is_no_smt) + '\n' +\
+		'portfolio_file  : ' + self.portfolio_file + '\n' +\
+		'max_flips       : ' + str(self.max_flips) + '\n' +\
+		'backend         : ' + self.backend + '\n' +\
+		'columnar_dir    : ' + self.columnar_dir + '\n' +\
+		'is_cost_aware   : ' + str(self.is_cost_aware) + '\n' +\
+		'mutation        : ' + self.mutation + '\n' +\
+		'stag_time       : ' + str(self.stag_time) + '\n' +\
+		'stag_points     : ' + str(self.stag_points) + '\n' +\
+		'kick            : ' + str(self.kick) + '\n' +\
+		'calib_cnf       : ' + self.calib_cnf + '\n' +\
+		'calib_ref       : ' + str(self.calib_ref) + '\n' +\
+		'calib_interval  : ' + str(self.calib_interval) + '\n' +\
+		'objective       : ' + self.objective + '\n' +\
+		'metrics_port    : ' + str(self.metrics_port) + '\n' +\
+		'metrics_file    : ' + self.metrics_file + '\n' +\
+		'scheduler       : ' + self.scheduler + '\n' +\
+		'baseline_reps   : ' + str(self.baseline_reps)
 		return s
 	def read(self, argv) :
 		for p in argv:
@@ -91,7 +304,7 @@ class Options:
 				tmp = p.split('-optalg=')[1]
 				tmp = tmp.replace("'", "")
 				self.opt_alg = tmp.replace('"', '')
-				assert(self.opt_alg in ["1+1", "GP", "RF", "ET", "GBRT"])
+				assert(self.opt_alg in optimizer_backends or self.opt_alg == "SH")
 			if '-defobj=' in p:
 				self.def_point_time = math.ceil(float(p.split('-defobj=')[1]))
 			if '-maxpoints=' in p:
@@ -106,7 +319,90 @@ class Options:
 				self.seed = int(p.split('-seed=')[1])
 			if p == '--solving':
 				self.is_solving = True
+			if '-eventlog=' in p:
+				self.event_log_file = p.split('-eventlog=')[1]
+			if '-flushint=' in p:
+				self.flush_interval = float(p.split('-flushint=')[1])
+			if '-profint=' in p:
+				self.profile_interval = float(p.split('-profint=')[1])
+			if '-stagingdir=' in p:
+				self.staging_dir = p.split('-stagingdir=')[1]
+			if '-staginglimit=' in p:
+				self.staging_limit = int(p.split('-staginglimit=')[1])
+			if p == '--validate':
+				self.is_validating = True
+			if '-topk=' in p:
+				self.top_k = int(p.split('-topk=')[1])
+			if '-valreps=' in p:
+				self.val_reps = int(p.split('-valreps=')[1])
+			if '-history=' in p:
+				self.history_file = p.split('-history=')[1]
+			if '-shsampler=' in p:
+				self.sh_sampler = p.split('-shsampler=')[1].replace("'", "").replace('"', '')
+				assert(self.sh_sampler in optimizer_backends)
+			if '-eta=' in p:
+				self.eta = int(p.split('-eta=')[1])
+			if '-minfid=' in p:
+				self.min_fidelity = int(p.split('-minfid=')[1])
+			if '-accept=' in p:
+				self.acceptance = p.split('-accept=')[1]
+				assert(self.acceptance in ["single", "robust"])
+			if '-accreps=' in p:
+				self.acc_reps = int(p.split('-accreps=')[1])
+			if '-accz=' in p:
+				self.acc_z = float(p.split('-accz=')[1])
+			if '-affinity=' in p:
+				self.affinity = p.split('-affinity=')[1]
+				assert(self.affinity in ["none", "core", "numa"])
+			if p == '--nosmt':
+				self.is_no_smt = True
+			if '-portfolio=' in p:
+				self.portfolio_file = p.split('-portfolio=')[1]
+			if '-maxflips=' in p:
+				self.max_flips = int(p.split('-maxflips=')[1])
+			if '-backend=' in p:
+				self.backend = p.split('-backend=')[1]
+				assert(self.backend in ["pool", "asyncio"])
+			if '-columnar=' in p:
+				self.columnar_dir = p.split('-columnar=')[1]
+			if p == '--costaware':
+				self.is_cost_aware = True
+			if '-mutation=' in p:
+				self.mutation = p.split('-mutation=')[1]
+				assert(self.mutation in ["fixed", "adaptive"])
+			if '-stagtime=' in p:
+				self.stag_time = float(p.split('-stagtime=')[1])
+			if '-stagpoints=' in p:
+				self.stag_points = int(p.split('-stagpoints=')[1])
+			if '-kick=' in p:
+				self.kick = int(p.split('-kick=')[1])
+			if '-calibcnf=' in p:
+				self.calib_cnf = p.split('-calibcnf=')[1]
+			if '-calibref=' in p:
+				self.calib_ref = float(p.split('-calibref=')[1])
+			if '-calibint=' in p:
+				self.calib_interval = float(p.split('-calibint=')[1])
+			if '-objective=' in p:
+				self.objective = p.split('-objective=')[1]
+				assert(self.objective in objective_limit_options)
+			if '-metricsport=' in p:
+				self.metrics_port = int(p.split('-metricsport=')[1])
+			if '-metricsfile=' in p:
+				self.metrics_file = p.split('-metricsfile=')[1]
+			if '-scheduler=' in p:
+				self.scheduler = p.split('-scheduler=')[1]
+			if '-baselinereps=' in p:
+				self.baseline_reps = int(p.split('-baselinereps=')[1])
 		assert(self.max_points > 0 and self.cpu_num > 0)
+		assert(self.top_k >= 0 and self.val_reps > 0)
+		assert(self.eta > 1 and self.min_fidelity > 0)
+		assert(self.acc_reps > 0 and self.acc_z >= 0)
+		assert(self.max_flips > 0 and self.kick > 0)
+		assert(self.baseline_reps >= 0)
+		# skopt models the cost only by GP and forests:
+		sampler = self.sh_sampler if self.opt_alg == "SH" else self.opt_alg
+		assert(not self.is_cost_aware or sampler in ["GP", "RF", "ET"])
+		assert(not (self.is_solving and self.opt_alg == "SH"))
 
 # Solver's parameter:
 class Param:
@@ -120,16 +416,89 @@ class Param:
 
 def print_usage():
   print('Usage : ' + script_name + ' solver solver-parameters cnfs-folder [Options]')
+  print('In the validation mode, the default point and -topk best points from the history are\n' +\
+  'run on cnfs-folder, and per-instance speedups with a paired Wilcoxon test are reported.')
   print('  Options :\n' +\
-  '  -optalg=["1+1", "GP", "RF", "ET", "GBRT"] - (default : "1+1") type of optimization algorithm' + '\n' +\
+  '  -optalg=["1+1", "GP", "RF", "ET", "GBRT", "SH"] - (default : "1+1") type of optimization algorithm' + '\n' +\
   '  -defobj=<float>        - (default : -1)    objective funtion value for the default point' + '\n' +\
   '  -maxpoints=<int>       - (default : 1000)  maximum number of points to process' + '\n' +\
   '  -maxtime=<int>         - (default : 86400) maximum script wall time' + '\n' +\
   '  -maxsolvertime=<int>   - (default : -1)    maximum SAT solver runtime' + '\n' +\
   '  -cpunum=<int>          - (default : 1)     number of used CPU cores' + '\n' +\
   '  -seed=<int>            - (default : 0)     seed for pseudorandom generator' + '\n' +\
-  '  --solving              - (default : off)   solving mode' + '\n\n' +\
-  'Points from the -pointsfile are used along with those which are generated.')
+  '  --solving              - (default : off)   solving mode' + '\n' +\
+  '  -eventlog=<str>        - (default : generated_points.jsonl) JSONL log of evaluations' + '\n' +\
+  '  -flushint=<float>      - (default : 10)    seconds between flushes of the event log' + '\n' +\
+  '  -profint=<float>       - (default : -1)    seconds between tuner profile dumps (-1 - only at the end)' + '\n' +\
+  '  -stagingdir=<str>      - (default : none)  folder for staged CNFs (/dev/shm/bbo_staging for compressed ones)' + '\n' +\
+  '  -staginglimit=<int>    - (default : 1024)  size limit of the staging folder in MB' + '\n' +\
+  '  --validate             - (default : off)   validation mode on the given (holdout) CNFs' + '\n' +\
+  '  -topk=<int>            - (default : 3)     number of best points from the history to validate' + '\n' +\
+  '  -valreps=<int>         - (default : 1)     runs with different solver seeds per point and CNF' + '\n' +\
+  '  -history=<str>         - (default : -eventlog) event log with the history of evaluations' + '\n' +\
+  '  -shsampler=["1+1", "GP", "RF", "ET", "GBRT"] - (default : "1+1") generator of new points for "SH"' + '\n' +\
+  '  -eta=<int>             - (default : 3)     reduction factor of successive halving' + '\n' +\
+  '  -minfid=<int>          - (default : 1)     number of CNFs on the lowest rung of successive halving' + '\n' +\
+  '  -accept=["single", "robust"] - (default : "single") acceptance of a new best point' + '\n' +\
+  '  -accreps=<int>         - (default : 3)     measurements of a candidate and the best point in the robust mode' + '\n' +\
+  '  -accz=<float>          - (default : 1.645) z-score of an improvement to be accepted in the robust mode' + '\n' +\
+  '  -affinity=["none", "core", "numa"] - (default : "none") binding of workers to CPU cores or NUMA nodes' + '\n' +\
+  '  --nosmt                - (default : off)   leave SMT siblings of used cores idle' + '\n' +\
+  '  -portfolio=<str>       - (default : none)  event log of a past run with strong points for the solving mode' + '\n' +\
+  '  -maxflips=<int>        - (default : 10)    maximum changed parameters of a portfolio point' + '\n' +\
+  '  -backend=["pool", "asyncio"] - (default : "pool") runner of solvers: pool of processes or event loop' + '\n' +\
+  '  -columnar=<str>        - (default : none)  folder for the run\'s history in the columnar format' + '\n' +\
+  '  --costaware            - (default : off)   expected improvement per second of "GP", "RF", "ET"' + '\n' +\
+  '  -mutation=["fixed", "adaptive"] - (default : "fixed") mutation strength of "1+1"' + '\n' +\
+  '  -stagtime=<float>      - (default : -1)    seconds without a new best point before a restart of "1+1"' + '\n' +\
+  '  -stagpoints=<int>      - (default : -1)    processed points without a new best point before a restart' + '\n' +\
+  '  -kick=<int>            - (default : 5)     maximum changed parameters of a restart point' + '\n' +\
+  '  -calibcnf=<str>        - (default : none)  satisfiable CNF of the machine-speed calibration' + '\n' +\
+  '  -calibref=<float>      - (default : -1)    runtime of the calibration on the reference machine' + '\n' +\
+  '  -calibint=<float>      - (default : -1)    seconds between calibrations (-1 - only at the start)' + '\n' +\
+  '  -objective=["time", "conflicts", "decisions"] - (default : "time") measure of solver runs' + '\n' +\
+  '  -metricsport=<int>     - (default : -1)    local HTTP port of live metrics (-1 - no server)' + '\n' +\
+  '  -metricsfile=<str>     - (default : "")    textfile rewritten with live metrics' + '\n' +\
+  '  -scheduler=<str>       - (default : "")    socket of the core scheduler of multi_study.py' + '\n' +\
+  '  -baselinereps=<int>    - (default : 1)     runs of the default point per CNF in the baseline' + '\n\n' +\
+  'Points from the -pointsfile are used along with those which are generated.' + '\n' +\
+  '"SH" is asynchronous successive halving, where the fidelity is the number of CNFs.' + '\n' +\
+  'In the robust acceptance mode, a better point is a candidate, which is re-measured on free' + '\n' +\
+  'cores and accepted if its mean sum time is better by acc_z standard errors.' + '\n' +\
+  'With binding, tuners on the same machine claim distinct CPUs, and a tuner refuses' + '\n' +\
+  'to start if not enough free CPUs are left.' + '\n' +\
+  'In the solving mode, cores run a portfolio of diverse points: the best points of the' + '\n' +\
+  '-portfolio history first, then random points around the default and past ones, each the' + '\n' +\
+  'farthest by Hamming distance from all generated points. A point which reaches' + '\n' +\
+  '-maxsolvertime is replaced by a fresh diverse one.' + '\n' +\
+  'In the adaptive mutation mode, the expected number of changed parameters follows' + '\n' +\
+  'the 1/5 success rule. If the neighbourhood of the best point is exhausted, i.e. only' + '\n' +\
+  'repeated points are generated, the number is doubled until a new best point is found.' + '\n' +\
+  'On stagnation, "1+1" restarts from a random point of the elite archive of local optima,' + '\n' +\
+  'where from 1 to -kick parameters are changed (iterated local search). The global best' + '\n' +\
+  'point is kept and written at the end.' + '\n' +\
+  'With calibration, the default point is run on -calibcnf, and all runtimes, time limits' + '\n' +\
+  'and objective values are in seconds of the reference machine: local runtimes are' + '\n' +\
+  'multiplied by the speed factor -calibref / (median of the latest calibration runtimes).' + '\n' +\
+  'Without -calibref, the first calibration defines the reference. The factor is logged' + '\n' +\
+  'with every evaluation.' + '\n' +\
+  'With a counter objective, runs are measured by the solver\'s statistics counter,' + '\n' +\
+  'and --conflicts= or --decisions= is given instead of --time=, so -maxsolvertime and' + '\n' +\
+  '-defobj are in the counter\'s units, and results are reproducible on any machine.' + '\n' +\
+  'In the cost-aware mode, the surrogate model also predicts the log of an evaluation\'s' + '\n' +\
+  'cost, i.e. of the mean solver time per CNF (the time limit for interrupted runs) times' + '\n' +\
+  'the number of CNFs, and points are proposed by expected improvement per second.' + '\n' +\
+  'Live metrics are in the Prometheus text format, they are refreshed every ' + \
+  str(METRICS_INTERVAL) + ' seconds.' + '\n' +\
+  'Without -defobj, the default point is first measured on all CNFs in parallel, one run' + '\n' +\
+  'per core and -baselinereps runs (with different seeds) per CNF, so the search starts' + '\n' +\
+  'with proper caps, and repeated runs estimate the noise (0 - the default point is' + '\n' +\
+  'calculated as other points).' + '\n' +\
+  'With a scheduler, at most -cpunum cores are used, and each one is leased from the' + '\n' +\
+  'scheduler for a calculation of a point, so tuners share a core budget.' + '\n' +\
+  'The asyncio backend starts solvers without a shell and is meant for many short runs;' + '\n' +\
+  'the validation mode always uses a pool of processes.' + '\n' +\
+  'CNFs can be compressed by xz, lzma, gzip or bzip2 (*.cnf.xz etc.).')
 
 # Convert string to int if not Boolean:
 def convert_if_int(x : str):
@@ -150,7 +519,7 @@ def read_pcs(param_file_name : str):
       assert(']' in line)
       #print(line)
       words = line.strip().split(' ')
-      assert(len(words) > 2)
+      assert(len(words) > 1)
       #print(words)
       prm = Param()
       prm.name = words[0]
@@ -161,7 +530,8 @@ def read_pcs(param_file_name : str):
       #print(lst)
       for x in lst:
           prm.values.append(convert_if_int(x))
-      assert(len(prm.values) > 1)
+      # A parameter with a single value is frozen:
+      assert(len(prm.values) > 0)
       assert(prm.default in ['true', 'false'] or isinstance(prm.default, int))
       #print(str(len(prm.values)))
       for val in prm.values:
@@ -169,13 +539,20 @@ def read_pcs(param_file_name : str):
         assert(val in ['true', 'false'] or isinstance(val, int))
       params.append(prm)
   assert(len(params) > 0)
+  assert(len(free_params(params)) > 0)
   return params
 
+# Indices of parameters which are not frozen:
+def free_params(params : list):
+  return [i for i in range(len(params)) if len(params[i].values) > 1]
+
 # Parse a CDCL solver's log:
 def parse_cdcl_result(cdcl_log : str):
 	t = -1.0
 	sat = -1
 	refuted_leaves = -1
+	# Integer counters of the statistics, e.g. 'c conflicts: 1234 56.78 per second':
+	counters = dict()
 	lines = cdcl_log.split('\n')
 	for line in lines:
 		if 'c process-time' in line:
@@ -183,28 +560,133 @@ def parse_cdcl_result(cdcl_log : str):
 			assert(len(words) >= 4)
 			assert(words[-1] == 'seconds')
 			t = float(words[-2])
-		assert('s UNSATISFIABLE' not in line)
+		elif line.startswith('c '):
+			words = line.split()
+			if len(words) >= 3 and words[1].endswith(':') and words[2].isdigit():
+				counters[words[1][:-1]] = int(words[2])
+		if 's UNSATISFIABLE' in line:
+			sat = 0
 		if 's SATISFIABLE' in line:
                   sat = 1
-	assert(t > 0)
-	return t, sat
+	return t, sat, counters
+
+# Classify a solver run by its log and exit code. Returns the status and
+# the value of the objective, which is the wall time if the log has no value:
+def classify_run(cdcl_log : str, exit_code : int, wall_time : float, \
+  objective='time'):
+  t, sat, counters = parse_cdcl_result(cdcl_log)
+  if objective != 'time':
+    # Zero counters of trivial CNFs would give zero sums:
+    t = max(counters[objective], 1) if objective in counters else -1
+  if exit_code not in NORMAL_EXIT_CODES:
+    is_memout = any(msg in cdcl_log.lower() for msg in MEMOUT_MESSAGES)
+    status = RunStatus.MEMOUT if is_memout else RunStatus.CRASH
+  elif t <= 0:
+    status = RunStatus.PARSE_ERROR
+  elif sat == 1:
+    status = RunStatus.SAT
+  elif sat == 0:
+    status = RunStatus.UNSAT
+  else:
+    status = RunStatus.TIMEOUT
+  if t <= 0:
+    t = max(wall_time, 0.01)
+  return status, t
+
+# Exit code of a process from its wait status. A shell reports a child
+# killed by a signal as 128 + signal, so it is converted to -signal:
+def exit_code_of(wait_status):
+  if wait_status is None:
+    return 0
+  code = os.waitstatus_to_exitcode(wait_status)
+  return 128 - code if code > 128 else code
+
+# Run a solver on a given point and CNF:
+# Returns the objective value and RunStatus. With a counter objective, its
+# value is returned instead of the time, and the time limit is a limit of
+# the counter:
+def run_solver(solver_name : str, params : list, point : list, \
+  cnf_file_name : str, solver_time_lim : float, staging_dir : str, \
+  staging_limit : int, extra_args='', objective='time'):
+  if staging_dir != '':
+    cnf_file_name = stage_cnf(cnf_file_name, staging_dir, staging_limit)
+  sys_str = ' '.join(solver_args(solver_name, params, point, cnf_file_name, \
+    solver_time_lim, extra_args, objective))
+  #print(sys_str)
+  run_start_time = time.time()
+  # Messages about running out of memory are in stderr:
+  pipe = os.popen(sys_str + ' 2>&1')
+  cdcl_log = pipe.read()
+  exit_code = exit_code_of(pipe.close())
+  status, t = classify_run(cdcl_log, exit_code, time.time() - run_start_time, objective)
+  return t, status, cdcl_log, sys_str
+
+# Command line of a solver as a list of arguments:
+def solver_args(solver_name : str, params : list, point : list, \
+  cnf_file_name : str, solver_time_lim : float, extra_args='', objective='time'):
+  args = [solver_name]
+  if solver_time_lim > 0:
+    rounded_solver_time_lim = math.ceil(solver_time_lim)
+    assert(rounded_solver_time_lim > 0)
+    args.append(objective_limit_options[objective] + str(rounded_solver_time_lim))
+  args += extra_args.split()
+  for i in range(len(params)):
+    args.append('--' + params[i].name + '=' + str(point[i]))
+  args.append(cnf_file_name)
+  return args
+
+# Run a solver as a subprocess of the event loop, at most cpu_num solvers
+# run at once:
+async def run_solver_async(solver_pool, solver_name : str, params : list, \
+  point : list, cnf_file_name : str, solver_time_lim : float, \
+  staging_dir : str, staging_limit : int, extra_args='', objective='time'):
+  if staging_dir != '':
+    cnf_file_name = await asyncio.to_thread(stage_cnf, cnf_file_name, \
+      staging_dir, staging_limit)
+  args = solver_args(solver_name, params, point, cnf_file_name, solver_time_lim, \
+    extra_args, objective)
+  async with solver_pool.semaphore:
+    cpu_set = solver_pool.cpu_sets.pop() if len(solver_pool.cpu_sets) > 0 else None
+    run_start_time = time.time()
+    try:
+      proc = await asyncio.create_subprocess_exec(*args, \
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, \
+        preexec_fn=(lambda: os.sched_setaffinity(0, cpu_set)) if cpu_set else None)
+      solver_pool.procs.add(proc)
+      if solver_pool.is_killed:
+        proc.kill()
+      out, _ = await proc.communicate()
+      solver_pool.procs.discard(proc)
+    finally:
+      if cpu_set:
+        solver_pool.cpu_sets.append(cpu_set)
+  cdcl_log = out.decode(errors='replace')
+  status, t = classify_run(cdcl_log, proc.returncode, time.time() - run_start_time, \
+    objective)
+  return t, status, cdcl_log, ' '.join(args)
 
 # Kill a solver:
-def kill_solver(solver : str, generated_points : dict):
+def kill_solver(solver : str, generated_points : dict, dispatch_times : dict, \
+  profiler):
   assert(solver != '')
   print('Killing SAT solver ' + solver)
-  # Mark all currently calculated points as unfinished to let them finish later:
+  mark_unfinished(generated_points, dispatch_times, profiler)
+  # Form a command line to kill all solver species:
+  print('Killing solver ' + solver)
+  sys_str = 'killall -9 ' + solver.replace('./','')
+  o = os.popen(sys_str).read()
+  time.sleep(1)
+
+# Mark all currently calculated points as unfinished to let them finish later:
+def mark_unfinished(generated_points : dict, dispatch_times : dict, profiler):
   new_unfinished_num = 0
   for point_tuple in generated_points:
      if generated_points[point_tuple] == PointStatus.STARTED:
         generated_points[point_tuple] = PointStatus.UNFINISHED
         new_unfinished_num += 1
+        # Core time spent on the point so far is lost:
+        profiler.preempt(time.time() - dispatch_times[point_tuple])
   print('Marked ' + str(new_unfinished_num) + ' started points as unfinished')
-  # Form a command line to kill all solver species:
-  print('Killing solver ' + solver)
-  sys_str = 'killall -9 ' + solver.replace('./','')
-  o = os.popen(sys_str).read()
-  time.sleep(1)
 
 # Create a copy of a given solver to kill the latter safely:
 def create_solver_copy(solver_name : str, random_str : str):
@@ -298,18 +780,22 @@ def ask_points(opt_alg : str, skt_opt, cur_best_point : list, params : list, par
   global skipped_points_num
   global skipped_impos_num
   global repeatedly_generated_points
+  global escalation
   if points_num_to_gen == 0:
     return []
   new_points = []
   if opt_alg == "1+1":
-     # Change each value with probability:
+     # Change each value of a non-frozen parameter with probability:
+    free_indices = free_params(params)
+    duplicates_in_row = 0
     while len(new_points) < points_num_to_gen:
+        flip_prob = min(1.0, mutation_rate * escalation / len(free_indices))
         pnt = copy.deepcopy(cur_best_point)
         # With probability 36 % the point is the same, so do until it is a new one:
         while pnt == cur_best_point:
-          for i in range(len(params)):
+          for i in free_indices:
             prob = random.random()
-            if (prob <= 1/len(params)):
+            if (prob <= flip_prob):
               pnt[i] = next_value(params[i].values, pnt[i])
         assert(pnt != cur_best_point)
         # Check if point is an impossible combination:
@@ -332,28 +818,246 @@ def ask_points(opt_alg : str, skt_opt, cur_best_point : list, params : list, par
             # The calculation is finished or the point is just generated:
             skipped_points_num += 1
             #print(str(skipped_points_num) + ' repeated points skipped')
+            duplicates_in_row += 1
+            # The neighbourhood is exhausted, so larger perturbations are made:
+            if duplicates_in_row >= MAX_DUPLICATES_IN_ROW and flip_prob < 1:
+              escalation *= 2
+              duplicates_in_row = 0
+              print('The neighbourhood of the best point is exhausted, ' + \
+                'expected number of changed parameters : ' + \
+                str(round(min(mutation_rate * escalation, len(free_indices)), 2)))
         else:
           # New point and possible combination:
           generated_points[point_tuple] = PointStatus.GENERATED
           new_points.append(pnt)
+          duplicates_in_row = 0
   elif opt_alg != "1+1": # "GP", "RF", "ET", "GBRT"
     new_points_npint64 = skt_opt.ask(n_points=points_num_to_gen)
     #print(generated_points)
     #print(new_points_npint64)
     assert(len(new_points_npint64) == points_num_to_gen)
     new_points = []
-    # Convert from numpy in64 to int:
+    # Convert from numpy in64 to int, Boolean values are kept as strings:
     for p in new_points_npint64:
-      new_points.append([int(x) for x in p])
-    for p in new_points:
-      assert(p != cur_best_point)
-      point_tuple = tuple(p)
-      # Each ask must be completed by tell, so no same points:
-      assert(point_tuple not in generated_points)
+      new_points.append([str(x) if str(x) in ['true', 'false'] else int(x) for x in p])
+    for i in range(len(new_points)):
+      point_tuple = tuple(new_points[i])
+      # Without a tell between asks, skopt proposes the same point again,
+      # so a random point from the space is taken instead:
+      while point_tuple in generated_points and \
+        generated_points[point_tuple] != PointStatus.UNFINISHED:
+        skipped_points_num += 1
+        rnd_point = skt_opt.space.rvs(n_samples=1, random_state=random.randrange(2**31))[0]
+        new_points[i] = [str(x) if str(x) in ['true', 'false'] else int(x) for x in rnd_point]
+        point_tuple = tuple(new_points[i])
+      if point_tuple in generated_points:
+        repeatedly_generated_points += 1
       generated_points[point_tuple] = PointStatus.GENERATED
     #
   return new_points
 
+# Asynchronous successive halving (ASHA), where the fidelity is the number
+# of CNFs. Rung r evaluates points on the first fids[r] CNFs (in a random
+# order), the top rung - on all CNFs. A point is promoted to the next rung
+# if it is among the best 1/eta points of its rung:
+class SuccessiveHalving:
+  def __init__(self, cnfs : list, min_fid : int, eta : int):
+    self.cnfs = copy.copy(cnfs)
+    random.shuffle(self.cnfs)
+    self.eta = eta
+    self.fids = []
+    fid = min_fid
+    while fid < len(cnfs):
+      self.fids.append(fid)
+      fid *= eta
+    self.fids.append(len(cnfs))
+    # Sum times of points on each rung, inf if interrupted:
+    self.rungs = [dict() for _ in self.fids]
+    self.promoted = [set() for _ in self.fids]
+    # Rungs of points to be started:
+    self.jobs = dict()
+  def top_rung(self):
+    return len(self.fids) - 1
+  def rung_cnfs(self, rung : int):
+    return self.cnfs[:self.fids[rung]]
+  def rung_of(self, fid : int):
+    return self.fids.index(fid)
+  def record(self, point_tuple : tuple, rung : int, sum_time : float):
+    self.rungs[rung][point_tuple] = sum_time if sum_time > 0 else math.inf
+  # A point to promote, starting from the highest rung, None if no such point:
+  def next_promotion(self):
+    for rung in reversed(range(self.top_rung())):
+      ranked = sorted(self.rungs[rung].items(), key=lambda x: x[1])
+      for point_tuple, sum_time in ranked[:len(ranked) // self.eta]:
+        if sum_time < math.inf and point_tuple not in self.promoted[rung]:
+          self.promoted[rung].add(point_tuple)
+          return point_tuple, rung + 1
+    return None
+  def __str__(self):
+    s = 'Successive halving rungs (CNFs, points) :'
+    for rung in range(len(self.fids)):
+      s += ' (' + str(self.fids[rung]) + ', ' + str(len(self.rungs[rung])) + ')'
+    return s
+
+# Generate points for successive halving: promoted points first, then
+# new points on the lowest rung by the sampler:
+def ask_sh_points(sh : SuccessiveHalving, sampler : str, skt_opt, \
+  cur_best_point : list, params : list, paramsdict : dict, \
+  points_num_to_gen : int, generated_points : dict):
+  new_points = []
+  while len(new_points) < points_num_to_gen:
+    promotion = sh.next_promotion()
+    if promotion is None:
+      break
+    point_tuple, rung = promotion
+    generated_points[point_tuple] = PointStatus.GENERATED
+    sh.jobs[point_tuple] = rung
+    new_points.append(list(point_tuple))
+  sampled_points = ask_points(sampler, skt_opt, cur_best_point, params, \
+    paramsdict, points_num_to_gen - len(new_points), generated_points)
+  for p in sampled_points:
+    sh.jobs[tuple(p)] = 0
+  return new_points + sampled_points
+
+# Hamming distance between points:
+def hamming(p1 : list, p2 : list):
+  return sum(1 for a, b in zip(p1, p2) if a != b)
+
+# A point where from 1 to max_flips non-frozen parameters of a given point are changed:
+def random_flips(point : list, params : list, max_flips : int):
+  free_indices = free_params(params)
+  pnt = list(point)
+  for i in random.sample(free_indices, random.randint(1, min(max_flips, len(free_indices)))):
+    pnt[i] = next_value(params[i].values, pnt[i])
+  return pnt
+
+# The candidate with the maximal Hamming distance to the closest given point:
+def farthest_point(candidates : list, points : list):
+  return max(candidates, key=lambda c: min((hamming(c, p) for p in points), default=0))
+
+# Order points so that each next one is the farthest from the previous ones:
+def diverse_order(points : list):
+  ordered = []
+  rest = list(points)
+  while len(rest) > 0:
+    p = farthest_point(rest, ordered)
+    ordered.append(p)
+    rest.remove(p)
+  return ordered
+
+# A point with random values of non-frozen parameters:
+def random_point(def_point : list, params : list):
+  pnt = list(def_point)
+  for i in free_params(params):
+    pnt[i] = random.choice(params[i].values)
+  return pnt
+
+# Generate points of a diverse portfolio for the solving mode. Strong points
+# from past runs go first, then random points around the default and past
+# points, each the farthest from all generated points. If all candidates are
+# already generated, the number of flips is doubled, and then random points of
+# the whole space are tried. If they are generated as well, the space is
+# considered exhausted, and fewer points are returned:
+def ask_portfolio_points(portfolio : list, portfolio_queue : list, def_point : list, \
+  params : list, points_num_to_gen : int, generated_points : dict, max_flips : int):
+  global skipped_points_num
+  new_points = []
+  free_num = len(free_params(params))
+  flips_num = max_flips
+  is_random = False
+  while len(new_points) < points_num_to_gen:
+    if len(portfolio_queue) > 0:
+      pnt = portfolio_queue.pop(0)
+      if tuple(pnt) in generated_points:
+        continue
+    else:
+      centers = [def_point] + portfolio
+      candidates = []
+      for _ in range(DIVERSITY_CANDIDATES):
+        if is_random:
+          c = random_point(def_point, params)
+        else:
+          c = random_flips(random.choice(centers), params, flips_num)
+        if tuple(c) in generated_points:
+          skipped_points_num += 1
+        else:
+          candidates.append(c)
+      if len(candidates) == 0:
+        if is_random:
+          print('The space of points is exhausted, ' + str(len(new_points)) + \
+            ' out of ' + str(points_num_to_gen) + ' points are generated')
+          break
+        if flips_num < free_num:
+          flips_num = min(2 * flips_num, free_num)
+        else:
+          is_random = True
+        continue
+      pnt = farthest_point(candidates, [list(t) for t in generated_points])
+    generated_points[tuple(pnt)] = PointStatus.GENERATED
+    new_points.append(pnt)
+  return new_points
+
+# Whether a point from a history belongs to the parameters' space:
+def is_in_space(point : list, params : list):
+  return len(point) == len(params) and \
+    all(point[i] in params[i].values for i in range(len(params)))
+
+# Repeated measurements of points on CNFs. The relative noise of runtimes
+# on a CNF is the pooled standard deviation of log-runtimes of all points
+# measured on it more than once:
+class NoiseModel:
+  def __init__(self, prior_noise : float):
+    self.prior_noise = prior_noise
+    # (point tuple, CNF) -> runtimes:
+    self.times = dict()
+    # CNF -> (sum of squared deviations of log-runtimes, degrees of freedom):
+    self.pooled = dict()
+  def add(self, point_tuple : tuple, instances : list):
+    for inst in instances:
+      if inst['status'] not in ['SAT', 'UNSAT']:
+        continue
+      key = (point_tuple, inst['cnf'])
+      lst = self.times.setdefault(key, [])
+      lst.append(inst['time'])
+      if len(lst) > 1:
+        self.update_pooled(inst['cnf'])
+  def update_pooled(self, cnf : str):
+    ssd = 0.0
+    dof = 0
+    for (point_tuple, c), lst in self.times.items():
+      if c != cnf or len(lst) < 2:
+        continue
+      logs = [math.log(t) for t in lst]
+      mean = sum(logs) / len(logs)
+      ssd += sum((x - mean)**2 for x in logs)
+      dof += len(logs) - 1
+    self.pooled[cnf] = (ssd, dof)
+  def rel_noise(self, cnf : str):
+    if cnf not in self.pooled or self.pooled[cnf][1] == 0:
+      return self.prior_noise
+    return math.sqrt(self.pooled[cnf][0] / self.pooled[cnf][1])
+  # Minimal number of measurements of a point over given CNFs:
+  def count(self, point_tuple : tuple, cnfs : list):
+    return min(len(self.times.get((point_tuple, cnf), [])) for cnf in cnfs)
+  # Sum of mean runtimes and its variance:
+  def mean_sum(self, point_tuple : tuple, cnfs : list):
+    sum_time = 0.0
+    var = 0.0
+    max_time = 0.0
+    for cnf in cnfs:
+      lst = self.times[(point_tuple, cnf)]
+      mean = sum(lst) / len(lst)
+      sum_time += mean
+      max_time = max(max_time, mean)
+      var += (mean * self.rel_noise(cnf))**2 / len(lst)
+    return sum_time, var, max_time
+  def __str__(self):
+    s = 'Relative runtime noise per CNF (degrees of freedom) :'
+    for cnf in sorted(self.pooled):
+      s += '\n  ' + cnf + ' : ' + str(round(self.rel_noise(cnf), 4)) + \
+        ' (' + str(self.pooled[cnf][1]) + ')'
+    return s
+
 # Difference between two given points (empty string if equal points):
 def points_diff(p1 : list, p2 : list, params : list):
   assert(len(p1) == len(p2))
@@ -368,17 +1072,36 @@ def points_diff(p1 : list, p2 : list, params : list):
   return res_str
 
 # Run solver on a given point:
-def calc_obj(solver_name : str, best_sum_time : float, \
+def calc_obj(*args):
+  steps = calc_obj_steps(*args)
+  try:
+    run = next(steps)
+    while True:
+      run = steps.send(run_solver(*run))
+  except StopIteration as stop:
+    return stop.value
+
+# Steps of calculating a point. Each solver run is yielded as arguments of
+# run_solver(), its result is sent back, so the same steps are driven by
+# a pool of processes (calc_obj) and by an event loop (calc_obj_async):
+def calc_obj_steps(solver_name : str, best_sum_time : float, \
   max_instance_time_best_point : float, \
   initial_max_solver_time : float, opt_alg : str, cnfs : list, \
   params : list, point : list, is_solving : bool, \
-  start_time : float, max_wall_time : float):
+  start_time : float, max_wall_time : float, staging_dir : str, \
+  staging_limit : int, speed_factor=1.0, objective='time'):
   assert(len(params) > 1)
+  # Counters do not depend on the machine's speed:
+  if objective != 'time':
+    speed_factor = 1.0
   assert(len(params) == len(point))
   assert(len(cnfs) > 0)
   cur_sum_time = 0.0
   max_instance_time = -1
   is_all_sat = True
+  run_start_time = time.time()
+  # Per-instance results for the event log:
+  instances = []
   # Solver's time limit on each CNF is the current best obj func value:
   if opt_alg == "1+1":
     if max_instance_time_best_point > 0:
@@ -395,30 +1118,28 @@ def calc_obj(solver_name : str, best_sum_time : float, \
   # Calculate sum for the solver runtimes:
   cnf_num = 0
   sat_num = 0
+  # Status of a failed solver run, if any:
+  failure = ''
   for cnf_file_name in cnfs:
     cnf_num += 1
-    sys_str = ''
-    if solver_time_lim > 0:
-      rounded_solver_time_lim = math.ceil(solver_time_lim)
-      assert(rounded_solver_time_lim > 0)
-      sys_str = solver_name + ' --time=' + str(rounded_solver_time_lim) + ' '
-    else:
-      sys_str = solver_name + ' '
-    for i in range(len(params)):
-      sys_str += '--' + params[i].name + '=' + str(point[i]) + ' '
-    sys_str += cnf_file_name
-    #print(sys_str)
-    cdcl_log = os.popen(sys_str).read()
-    t, sat = parse_cdcl_result(cdcl_log)
+    # Times are in seconds of the reference machine, the solver gets a local limit:
+    local_time_lim = solver_time_lim / speed_factor if solver_time_lim > 0 else solver_time_lim
+    t, status, cdcl_log, sys_str = yield (solver_name, params, point, \
+      cnf_file_name, local_time_lim, staging_dir, staging_limit, '', objective)
+    t *= speed_factor
     assert(t > 0)
-    assert(sat == -1 or sat == 1)
-    # If the solver is interrupted at least once,
-    if sat == -1 or (solver_time_lim > 0 and t >= solver_time_lim):
-      # interrupt calculation and set obj func value to -1 (INTERRUPTED):
+    if status in SOLVED_RUN_STATUSES and solver_time_lim > 0 and t >= solver_time_lim:
+      status = RunStatus.TIMEOUT
+    instances.append({'cnf' : cnf_file_name, 'time' : t, 'status' : status.name})
+    # If the solver is interrupted or failed at least once,
+    if status not in SOLVED_RUN_STATUSES:
+      # interrupt calculation and set obj func value to -1 (INTERRUPTED or FAILED):
       cur_sum_time = -1
+      if status != RunStatus.TIMEOUT:
+        failure = status.name
+        print('Solver run ' + status.name + ' : ' + sys_str)
       break
     else:
-      assert(sat == 1) # SAT should be here
       sat_num += 1
       # Only if a CNF is solved in time limit:
       cur_sum_time += t
@@ -427,7 +1148,7 @@ def calc_obj(solver_name : str, best_sum_time : float, \
       # In solving mode, the CDCL solver's log should be saved:
       if is_solving:
         assert('.cnf' in cnf_file_name)
-        cdcl_log_file_name = 'log_' + solver_name.replace('./','') + '_' + os.path.basename(cnf_file_name.split('.cnf')[0])
+        cdcl_log_file_name = 'log_' + os.path.basename(solver_name) + '_' + os.path.basename(cnf_file_name.split('.cnf')[0])
         now = datetime.now()
         cdcl_log_file_name += '_' + now.strftime("%d-%m-%Y_%H-%M-%S")
         print('Writing CDCL solver log to file ' + cdcl_log_file_name)
@@ -452,7 +1173,23 @@ def calc_obj(solver_name : str, best_sum_time : float, \
   if sat_num == len(cnfs):
     is_all_sat = True
   #print('Obj func value : ' + str(cur_sum_time))
-  return point, cur_sum_time, max_instance_time, is_all_sat, sys_str
+  run_info = {'worker' : os.getpid(), 'start' : round(run_start_time, 3), \
+    'finish' : round(time.time(), 3), 'cap' : solver_time_lim, \
+    'fidelity' : len(cnfs), 'instances' : instances, 'speed_factor' : speed_factor, \
+    'failure' : failure}
+  return point, cur_sum_time, max_instance_time, is_all_sat, sys_str, run_info
+
+# Calculate a point in an event loop:
+async def calc_obj_async(solver_pool, worker : int, *args):
+  steps = calc_obj_steps(*args)
+  try:
+    run = next(steps)
+    while True:
+      run = steps.send(await run_solver_async(solver_pool, *run))
+  except StopIteration as stop:
+    res = stop.value
+  res[5]['worker'] = worker
+  return res
 
 # Collect a result produced by solver:
 def collect_result(res):
@@ -471,19 +1208,39 @@ def collect_result(res):
   global skt_opt
   global cnfs_num
   global penalty_sum_time
+  global event_log
+  global profiler
+  global sh
+  collect_start_time = time.time()
   assert(cnfs_num > 0)
-  assert(len(res) == 5)
+  assert(len(res) == 6)
   point = res[0]
   cur_sum_time = res[1]
   max_wall_time = res[2]
   is_all_sat = res[3]
   command = res[4]
+  run_info = res[5]
   # If interrupted, then not all instances are satisfiable:
   assert(cur_sum_time > 0 or (cur_sum_time < 0 and not is_all_sat))
   #print('Sum time in collect_result : ' + str(cur_sum_time) + ' seconds')
   #print('max_wall_time : ' + str(max_wall_time) + ' seconds')
   tuple_point = tuple(point)
   assert(generated_points[tuple_point] == PointStatus.STARTED or generated_points[tuple_point] == PointStatus.UNFINISHED)
+  # Solvers killed because of a new best point fail, such results are dropped:
+  if generated_points[tuple_point] == PointStatus.UNFINISHED and run_info['failure'] != '':
+    return
+  # The surrogate model to tell results:
+  sampler = op.sh_sampler if op.opt_alg == 'SH' else op.opt_alg
+  is_full_fidelity = True
+  if op.opt_alg == 'SH':
+    rung = sh.rung_of(run_info['fidelity'])
+    sh.record(tuple_point, rung, cur_sum_time if is_all_sat else -1)
+    is_full_fidelity = rung == sh.top_rung()
+    # Each point is told once, with the sum time extrapolated to all CNFs:
+    if rung > 0:
+      sampler = '1+1'
+    elif is_all_sat:
+      cur_tell_time = cur_sum_time * cnfs_num / run_info['fidelity']
   # Three cases:
   # 1) A SAT solver was interrupted on a CNF due to a time limit, so STARTED -> INTERRUPTED
   # 2) A SAT solver was interrupted on a CNF since a new record is found (and then kill_solver() 
@@ -491,65 +1248,674 @@ def collect_result(res):
   #      point be processed again later.
   # 3) All CNFs are processed, and the point is marked STARTED, so STARTED -> FINISHED
   # 4) All CNFs are processed, and the point is marked UNFINISHED by kill_solver(), so UNFINISHED -> FINISHED
+  # 5) The SAT solver failed on a CNF, so STARTED -> FAILED
   if is_all_sat == True:
     generated_points[tuple_point] = PointStatus.FINISHED
     print('Finished points with sum_time ' + str(cur_sum_time) + ' , max_inst_time ' + str(max_wall_time))
-    if op.opt_alg != '1+1':
-      res = skt_opt.tell(point, cur_sum_time)
+    # Without a solver's time limit, the penalty is twice the worst sum time:
+    if op.max_solver_time <= 0:
+      penalty_sum_time = max(penalty_sum_time, \
+        2 * cur_sum_time * cnfs_num / run_info['fidelity'])
+    if sampler != '1+1':
+      tell_point(point, cur_tell_time if op.opt_alg == 'SH' else cur_sum_time, \
+        run_info['instances'])
   else:
     # If a new best point is found and all current points are interrupted by killing their solvers,
     # then these points already have the status 'unfinished', so do not change their status here.
     # Otherwise, the status is changed:
     if generated_points[tuple_point] == PointStatus.STARTED:
-      generated_points[tuple_point] = PointStatus.INTERRUPTED
-      if op.opt_alg != '1+1':
-        # Penalty-value of the objective function if interrupted:
-        res = skt_opt.tell(point, penalty_sum_time)
+      if run_info['failure'] != '':
+        generated_points[tuple_point] = PointStatus.FAILED
+      else:
+        generated_points[tuple_point] = PointStatus.INTERRUPTED
+      # Penalty-value of the objective function if interrupted or failed,
+      # it is unknown until a point is finished if there is no time limit:
+      if sampler != '1+1' and penalty_sum_time > 0:
+        tell_point(point, penalty_sum_time, run_info['instances'], \
+          run_info['failure'] != '')
+  event = {'event' : 'eval', 'point' : point, \
+    'status' : generated_points[tuple_point].name, 'sum_time' : cur_sum_time, \
+    'max_time' : max_wall_time}
+  event.update(run_info)
+  event_log.write(event)
+  profiler.collect(run_info)
   finished_points_num = finished(generated_points)
   interrupted_points_num = interrupted(generated_points)
   elapsed_sec = time.time() - start_time
   s = str(finished_points_num) + ' finished points, ' + str(interrupted_points_num) + ' interrupted points, ' + \
     'elapsed ' + str(elapsed_sec)
   print(s)
-  # In case of 1+1, do not move to almost the same record-wise point:
-  if op.opt_alg == '1+1':
+  # In case of 1+1, do not move to almost the same record-wise point
+  # (in the robust acceptance mode, the noise defines it instead):
+  if op.opt_alg == '1+1' and op.acceptance == 'single':
     coef = COEF_NEW_BEST_POINT
   # Otherwise, move to any record-wise best point:
   else:
     coef = 1
-  # If a new record point is found:
-  if (is_all_sat == True and cur_sum_time > 0) and (cur_sum_time < best_sum_time*coef or best_sum_time <= 0):
-    is_updated = True
-    updates_num += 1
-    best_sum_time = cur_sum_time
-    best_point = copy.deepcopy(point)
-    best_command = command
-    max_instance_time_best_point = max_wall_time
-    elapsed_time = round(time.time() - start_time, 2)
-    print('')
-    print('Updated best sum time : ' + str(best_sum_time))
-    print('max_instance_time_best_point : ' + str(max_instance_time_best_point))
-    print('elapsed : ' + str(elapsed_time) + ' seconds')
-    if def_point == best_point:
-      print('The new record point is the default one')
-      if default_sum_time == -1:
-        default_sum_time = best_sum_time
+  if op.acceptance == 'robust' and is_all_sat:
+    noise.add(tuple_point, run_info['instances'])
+  # If a new record point is found (on all CNFs):
+  # Points started before a restart are not in the current local search:
+  is_record = is_full_fidelity and (is_all_sat == True and cur_sum_time > 0) and \
+    (cur_sum_time < best_sum_time*coef or best_sum_time <= 0) and \
+    run_info['start'] >= last_restart_time
+  if is_record:
+    if op.acceptance == 'robust' and best_sum_time > 0:
+      add_candidate(point, command)
     else:
-      diff_str = points_diff(def_point, best_point, params)
-      assert(diff_str != '')
-      print('Difference from the default point :')
-      print(diff_str)
-    print(best_command + '\n')
+      update_best(point, cur_sum_time, max_wall_time, command)
+  # Points killed because of a new best point are neither successes nor failures:
+  if op.opt_alg == '1+1' and generated_points[tuple_point] != PointStatus.UNFINISHED:
+    adapt_mutation(is_record)
+  profiler.add('collect', time.time() - collect_start_time)
+
+# Collect a calculation of a point which raised an exception, e.g. if the
+# solver could not be started. The point is failed as if the solver crashed,
+# so it is neither lost as started nor generated again:
+def collect_error(point : list, fidelity : int, exc):
+  print('Calculation of a point failed : ' + repr(exc))
+  run_info = {'worker' : -1, 'start' : round(dispatch_times[tuple(point)], 3), \
+    'finish' : round(time.time(), 3), 'cap' : -1, 'fidelity' : fidelity, \
+    'instances' : [], 'speed_factor' : speed_factor, \
+    'failure' : RunStatus.CRASH.name}
+  collect_result((point, -1, -1, False, '', run_info))
+
+# 1/5 success rule for the expected number of changed parameters in (1+1):
+def adapt_mutation(is_success : bool):
+  global mutation_rate
+  if op.mutation != 'adaptive':
+    return
+  if is_success:
+    mutation_rate *= MUTATION_ADAPT_FACTOR
+  else:
+    mutation_rate /= pow(MUTATION_ADAPT_FACTOR, 1/4)
+  mutation_rate = min(max(mutation_rate, 1.0), max(1.0, len(free_params(params)) / 2))
+
+# Tell a result to the surrogate model. In the cost-aware mode, the cost of
+# an evaluation on all CNFs is extrapolated from the runs on processed CNFs,
+# where an interrupted run costs at least its time limit. A failed evaluation
+# costs at least the worst cost so far (or its penalty if there is none), so
+# the cost model does not find failing points cheap and propose them again:
+def tell_point(point : list, obj : float, instances : list, is_failed=False):
+  global worst_eval_cost
+  tell_start_time = time.time()
+  if op.is_cost_aware:
+    cost = MIN_EVAL_COST
+    if len(instances) > 0:
+      cost = sum(inst['time'] for inst in instances) / len(instances) * cnfs_num
+    if is_failed:
+      cost = max(cost, worst_eval_cost if worst_eval_cost > 0 else obj)
+    worst_eval_cost = max(worst_eval_cost, cost)
+    skt_opt.tell(point, [obj, max(cost, MIN_EVAL_COST)])
+  else:
+    skt_opt.tell(point, obj)
+  profiler.add('tell', time.time() - tell_start_time)
+
+# Make a given point the best one:
+def update_best(point : list, cur_sum_time : float, max_wall_time : float, \
+  command : str):
+  global updates_num
+  global default_sum_time
+  global best_sum_time
+  global best_point
+  global best_command
+  global max_instance_time_best_point
+  global is_updated
+  global escalation
+  global global_best
+  global last_update_time
+  global last_update_points
+  is_updated = True
+  updates_num += 1
+  # The neighbourhood of a new best point is not explored yet:
+  escalation = 1
+  best_sum_time = cur_sum_time
+  best_point = copy.deepcopy(point)
+  best_command = command
+  max_instance_time_best_point = max_wall_time
+  last_update_time = time.time()
+  last_update_points = processed(generated_points)
+  # After a restart, the best point of the current local search (incumbent)
+  # might be worse than the global best one:
+  is_global = global_best[1] <= 0 or best_sum_time < global_best[1]
+  if is_global:
+    global_best = (best_point, best_sum_time, max_instance_time_best_point, best_command)
+  elapsed_time = round(time.time() - start_time, 2)
+  print('')
+  print('Updated ' + ('best' if is_global else 'incumbent') + ' sum time : ' + str(best_sum_time))
+  print('max_instance_time_best_point : ' + str(max_instance_time_best_point))
+  print('elapsed : ' + str(elapsed_time) + ' seconds')
+  event_log.write({'event' : 'best' if is_global else 'incumbent', 'point' : best_point, \
+    'sum_time' : best_sum_time, 'max_time' : max_instance_time_best_point, \
+    'elapsed' : elapsed_time})
+  if def_point == best_point:
+    print('The new record point is the default one')
+    if default_sum_time == -1:
+      default_sum_time = best_sum_time
+  else:
+    diff_str = points_diff(def_point, best_point, params)
+    assert(diff_str != '')
+    print('Difference from the default point :')
+    print(diff_str)
+  print(best_command + '\n')
+
+# Measure the default point on all CNFs in parallel, one run per core and
+# -baselinereps runs with different seeds per CNF. Runtimes are averaged over
+# seeds. Returns the sum and the maximum of them, or -1 and -1 if a run is
+# not solved, and per-CNF results of the first seed:
+def measure_baseline():
+  factor = speed_factor if op.objective == 'time' else 1.0
+  time_lim = op.max_solver_time / factor if op.max_solver_time > 0 else op.max_solver_time
+  tasks = []
+  for rep in range(op.baseline_reps):
+    for cnf in cnfs:
+      tasks.append((solver_name, params, 0, def_point, cnf, rep, time_lim, \
+        op.staging_dir, op.staging_limit, op.objective))
+  print('Baseline : ' + str(len(tasks)) + ' runs of the default point on ' + \
+    str(op.cpu_num) + ' CPU cores')
+  # Each run leases its own core and returns it when finished, so tuners
+  # sharing cores by a scheduler do not wait for each other's whole baselines.
+  # Slots keep at most cpu_num runs in the pool, so a run starts on its lease:
+  slots = threading.Semaphore(op.cpu_num)
+  results = []
+  errors = []
+  def collect_baseline_run(run_start_time : float, res):
+    profiler.busy_core_sec += time.time() - run_start_time
+    profiler.solver_sec += res[3]
+    results.append(res)
+    slots.release()
+  def report_baseline_error(exc):
+    report_error(exc)
+    errors.append(exc)
+    slots.release()
+  baseline_start_time = time.time()
+  with make_pool(op.cpu_num, cpu_sets) as pool:
+    for task in tasks:
+      slots.acquire()
+      if time.time() - start_time >= op.max_wall_time or not lease_core():
+        print('The time limit is reached on the baseline')
+        break
+      pool.apply_async(calc_validation_run, task, \
+        callback=leased(functools.partial(collect_baseline_run, time.time())), \
+        error_callback=leased(report_baseline_error))
+    pool.close()
+    pool.join()
+  results.sort(key=lambda res: (res[2], cnfs.index(res[1])))
+  times = {cnf : [] for cnf in cnfs}
+  instances = []
+  # Runs which were not started or failed with an exception are not solved:
+  is_all_solved = len(results) == len(tasks)
+  # The first failure other than a timeout, as in calc_obj_steps():
+  failure = RunStatus.CRASH.name if len(errors) > 0 else ''
+  for _, cnf, rep, t, status in results:
+    t *= factor
+    times[cnf].append(t)
+    is_all_solved = is_all_solved and status in SOLVED_RUN_STATUSES
+    if failure == '' and status not in SOLVED_RUN_STATUSES + [RunStatus.TIMEOUT]:
+      failure = status.name
+    inst = {'cnf' : cnf, 'time' : t, 'status' : status.name}
+    noise.add(tuple(def_point), [inst])
+    if rep == 0:
+      instances.append(inst)
+  run_info = {'worker' : -1, 'start' : round(baseline_start_time, 3), \
+    'finish' : round(time.time(), 3), 'cap' : op.max_solver_time, \
+    'fidelity' : len(cnfs), 'instances' : instances, 'speed_factor' : factor, \
+    'failure' : failure}
+  if not is_all_solved:
+    return -1, -1, run_info
+  mean_times = [sum(times[cnf]) / len(times[cnf]) for cnf in cnfs]
+  if op.baseline_reps > 1:
+    rel_noise = sum(noise.rel_noise(cnf) for cnf in cnfs) / len(cnfs)
+    print('Baseline relative noise of runtimes : ' + str(round(rel_noise, 4)))
+  return sum(mean_times), max(mean_times), run_info
+
+# Whether (1+1) stagnates, i.e. the best point is not updated for long:
+def is_stagnated(processed_points_num : int):
+  if op.opt_alg != '1+1' or op.is_solving:
+    return False
+  if op.stag_time > 0 and time.time() - last_update_time >= op.stag_time:
+    return True
+  return op.stag_points > 0 and processed_points_num - last_update_points >= op.stag_points
+
+# Restart (1+1) from a perturbed point of the elite archive of local optima.
+# The restart point is processed first, and the first finished point becomes
+# the incumbent:
+def restart_search(processed_points_num : int):
+  global best_point
+  global best_sum_time
+  global best_command
+  global max_instance_time_best_point
+  global escalation
+  global last_update_time
+  global last_update_points
+  global last_restart_time
+  global restarts_num
+  if best_sum_time > 0 and all(p != best_point for _, p in elite):
+    elite.append((best_sum_time, best_point))
+    elite.sort(key=lambda x: x[0])
+    del elite[ELITE_SIZE:]
+  center = random.choice(elite)[1] if len(elite) > 0 else global_best[0]
+  new_point = random_flips(center, params, op.kick)
+  restarts_num += 1
+  print('Stagnation after ' + str(round(time.time() - last_update_time, 2)) + ' seconds and ' + \
+    str(processed_points_num - last_update_points) + ' points, restart ' + str(restarts_num))
+  print('Difference of the restart point from the default point :')
+  print(points_diff(def_point, new_point, params))
+  event_log.write({'event' : 'restart', 'point' : new_point, 'center' : center})
+  best_point = new_point
+  best_sum_time = -1
+  best_command = ''
+  max_instance_time_best_point = op.max_solver_time
+  escalation = 1
+  start_points.append(new_point)
+  last_update_time = time.time()
+  last_update_points = processed_points_num
+  last_restart_time = time.time()
+
+# A better point becomes a candidate to be re-measured along with the best
+# point. The command of its calculation is kept for the case it is accepted:
+def add_candidate(point : list, command : str):
+  global candidates
+  tuple_point = tuple(point)
+  if tuple_point in candidates:
+    return
+  print('Candidate point is to be re-measured ' + str(op.acc_reps - 1) + ' times')
+  candidates[tuple_point] = (point, command)
+  # Called in the pool's thread, while the main thread takes from the queue:
+  with remeasure_lock:
+    for p in [point, best_point]:
+      queued_num = sum(1 for q in remeasure_queue + remeasure_started if q == p)
+      needed_num = op.acc_reps - noise.count(tuple(p), cnfs) - queued_num
+      for _ in range(needed_num):
+        remeasure_queue.append(copy.deepcopy(p))
+
+# Start re-measuring a point in a pool of workers. The point was already
+# calculated on all CNFs, so twice its maximal runtime is a safe limit:
+def start_remeasure(pool, point : list):
+  if not lease_core(pool):
+    return
+  with remeasure_lock:
+    remeasure_started.append(point)
+  tuple_point = tuple(point)
+  time_lim = op.max_solver_time
+  if noise.count(tuple_point, cnfs) > 0:
+    time_lim = 2 * max(max(noise.times[(tuple_point, cnf)]) for cnf in cnfs)
+  pool.apply_async(calc_obj, args=(solver_name, -1, time_lim, op.max_solver_time, '1+1', cnfs, params, point, False, start_time, op.max_wall_time, op.staging_dir, op.staging_limit, speed_factor, op.objective), callback=leased(collect_remeasure), \
+    error_callback=leased(report_error))
+
+# Speed factor of the machine from the latest calibration runtimes:
+def update_speed_factor(calib_time : float):
+  global speed_factor
+  global calib_ref
+  calib_times.append(calib_time)
+  del calib_times[:-CALIB_WINDOW]
+  median_time = sorted(calib_times)[len(calib_times) // 2]
+  if calib_ref <= 0:
+    calib_ref = median_time
+    print('Calibration runtime ' + str(calib_ref) + ' is the reference, use -calibref=' + \
+      str(calib_ref) + ' on other machines')
+  speed_factor = calib_ref / median_time
+  print('Calibration runtime : ' + str(calib_time) + ' , speed factor : ' + str(round(speed_factor, 4)))
+  event_log.write({'event' : 'calibration', 'runtime' : calib_time, \
+    'speed_factor' : speed_factor})
+
+# Calibrate on the default point on the calibration CNF while other cores are busy:
+def start_calibration(pool):
+  if not lease_core(pool):
+    return
+  pool.apply_async(calc_obj, args=(solver_name, -1, -1, -1, '1+1', [op.calib_cnf], params, def_point, False, start_time, op.max_wall_time, op.staging_dir, op.staging_limit), callback=leased(collect_calibration), \
+    error_callback=leased(report_error))
+
+def collect_calibration(res):
+  # Runtime of the default point on the calibration CNF:
+  if res[3]:
+    update_speed_factor(res[1])
+
+# Whether a queued re-measurement is still needed for a pending candidate:
+def is_remeasure_needed(point : list):
+  return tuple(point) in candidates or (point == best_point and len(candidates) > 0)
+
+# Drop queued re-measurements which are not needed anymore and take the first
+# num of the rest. The queue is changed in place under the lock since
+# add_candidate() appends to it in the pool's thread:
+def take_remeasures(num : int):
+  with remeasure_lock:
+    remeasure_queue[:] = [p for p in remeasure_queue if is_remeasure_needed(p)]
+    taken = remeasure_queue[:num]
+    del remeasure_queue[:num]
+  return taken
+
+# Collect a re-measurement and decide on candidates with enough measurements:
+def collect_remeasure(res):
+  global candidates
+  assert(len(res) == 6)
+  point = res[0]
+  is_all_sat = res[3]
+  run_info = res[5]
+  tuple_point = tuple(point)
+  # A re-measurement killed because of a new best point is started again on
+  # the next iteration:
+  if run_info['failure'] != '' and is_killing_solvers:
+    return
+  with remeasure_lock:
+    if point in remeasure_started:
+      remeasure_started.remove(point)
+  # A failed re-measurement is queued again unless it failed too many times,
+  # then the point's candidates are rejected:
+  if run_info['failure'] != '':
+    remeasure_failures[tuple_point] = remeasure_failures.get(tuple_point, 0) + 1
+    print('Re-measurement failed with ' + run_info['failure'] + ' ' + \
+      str(remeasure_failures[tuple_point]) + ' times')
+    if remeasure_failures[tuple_point] < MAX_REMEASURE_FAILURES:
+      with remeasure_lock:
+        remeasure_queue.insert(0, point)
+    elif tuple_point in candidates:
+      print('Candidate point is rejected since its re-measurements fail')
+      del candidates[tuple_point]
+    elif point == best_point and len(candidates) > 0:
+      print(str(len(candidates)) + ' candidate points are rejected since ' + \
+        're-measurements of the best point fail')
+      candidates.clear()
+    return
+  event = {'event' : 'remeasure', 'point' : point, 'sum_time' : res[1]}
+  event.update(run_info)
+  event_log.write(event)
+  profiler.collect(run_info)
+  if is_all_sat:
+    noise.add(tuple_point, run_info['instances'])
+  elif tuple_point in candidates:
+    print('Candidate point is rejected since it was interrupted on a re-measurement')
+    del candidates[tuple_point]
+  best_tuple = tuple(best_point)
+  for cand_tuple in list(candidates):
+    if noise.count(cand_tuple, cnfs) < op.acc_reps or \
+      noise.count(best_tuple, cnfs) < op.acc_reps:
+      continue
+    cand_point, cand_command = candidates.pop(cand_tuple)
+    cand_sum, cand_var, cand_max = noise.mean_sum(cand_tuple, cnfs)
+    best_sum, best_var, best_max = noise.mean_sum(best_tuple, cnfs)
+    threshold = op.acc_z * math.sqrt(cand_var + best_var)
+    print('Candidate mean sum time ' + str(round(cand_sum, 2)) + ' vs best ' + \
+      str(round(best_sum, 2)) + ' , required improvement ' + str(round(threshold, 2)))
+    if best_sum - cand_sum > threshold:
+      update_best(cand_point, cand_sum, cand_max, cand_command)
+      best_tuple = cand_tuple
+    else:
+      print('Candidate point is rejected as its improvement is within the noise')
+
+# Read a small sysfs file, None if it does not exist:
+def read_sysfs(file_name : str):
+  try:
+    with open(file_name, 'r') as f:
+      return f.read().strip()
+  except OSError:
+    return None
+
+# CPUs available to the tuner as (cpu, package, core, node), where
+# the first SMT thread of each physical core goes first, then the siblings.
+# If no_smt, then only the first threads are given:
+def read_cpu_topology(no_smt : bool):
+  cpus = []
+  for cpu in sorted(os.sched_getaffinity(0)):
+    base = '/sys/devices/system/cpu/cpu' + str(cpu)
+    package = read_sysfs(base + '/topology/physical_package_id')
+    core = read_sysfs(base + '/topology/core_id')
+    node = 0
+    for f in glob.glob(base + '/node*'):
+      node = int(os.path.basename(f).replace('node', ''))
+    cpus.append((cpu, int(package) if package else 0, \
+      int(core) if core else cpu, node))
+  first_threads = []
+  siblings = []
+  seen_cores = set()
+  for c in cpus:
+    if (c[1], c[2]) in seen_cores:
+      siblings.append(c)
+    else:
+      seen_cores.add((c[1], c[2]))
+      first_threads.append(c)
+  return first_threads if no_smt else first_threads + siblings
+
+# Claim cpu_num CPUs not claimed by other tuners via lock files.
+# Returns the claimed CPUs, an empty list if there are not enough free ones:
+def claim_cpus(topology : list, cpu_num : int):
+  global claimed_cpu_locks
+  os.makedirs(CPU_LOCKS_DIR, exist_ok=True)
+  claimed = []
+  for c in topology:
+    if len(claimed) == cpu_num:
+      break
+    fd = os.open(os.path.join(CPU_LOCKS_DIR, 'cpu' + str(c[0]) + '.lock'), \
+      os.O_WRONLY | os.O_CREAT, 0o666)
+    try:
+      fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+      os.close(fd)
+      continue
+    claimed_cpu_locks.append(fd)
+    claimed.append(c)
+  if len(claimed) < cpu_num:
+    for fd in claimed_cpu_locks:
+      os.close(fd)
+    claimed_cpu_locks = []
+    return []
+  return claimed
+
+# CPU sets of worker slots. In the core mode, a slot is bound to one CPU,
+# in the numa mode - to all claimed CPUs of the NUMA node of its CPU:
+def worker_cpu_sets(claimed : list, affinity : str):
+  if affinity == 'core':
+    return [{c[0]} for c in claimed]
+  return [{x[0] for x in claimed if x[3] == c[3]} for c in claimed]
+
+# Bind a pool worker to the next free slot. Solvers inherit the binding:
+def bind_worker(slots_queue):
+  try:
+    cpu_set = slots_queue.get(timeout=1)
+  except queue.Empty:
+    return
+  os.sched_setaffinity(0, cpu_set)
+
+# Create a pool of workers bound to slots if needed:
+def make_pool(cpu_num : int, cpu_sets : list):
+  if len(cpu_sets) == 0:
+    return mp.Pool(cpu_num)
+  slots_queue = mp.Queue()
+  for cpu_set in cpu_sets[:cpu_num]:
+    slots_queue.put(cpu_set)
+  return mp.Pool(cpu_num, initializer=bind_worker, initargs=(slots_queue,))
+
+# Points calculated by an asyncio event loop in a thread, an alternative to
+# mp.Pool for short solver runs. As in mp.Pool, pending tasks are kept in
+# _cache, callbacks are called one by one in the pool's callback thread, and
+# an exception of a task is given to its error callback. Callbacks (e.g. a
+# refit of the surrogate model) are not run in the event loop, so solvers
+# which finish meanwhile are collected. Only calc_obj is supported:
+class AsyncSolverPool:
+  def __init__(self, cpu_num : int, cpu_sets : list):
+    self.semaphore = asyncio.Semaphore(cpu_num)
+    # CPU sets of idle slots if solvers are bound:
+    self.cpu_sets = list(cpu_sets[:cpu_num])
+    self.procs = set()
+    self.is_killed = False
+    self._cache = dict()
+    self.task_num = 0
+    self.free_workers = list(range(cpu_num))
+    self.cond = threading.Condition()
+    self.loop = asyncio.new_event_loop()
+    self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    self.thread.start()
+    # A single thread keeps the optimizer's state consistent:
+    self.callback_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+  def apply_async(self, func, args=(), callback=None, error_callback=None):
+    assert(func == calc_obj)
+    with self.cond:
+      task_id = self.task_num
+      self.task_num += 1
+      worker = self.free_workers.pop(0) if len(self.free_workers) > 0 else len(self._cache)
+      self._cache[task_id] = worker
+    asyncio.run_coroutine_threadsafe(self.run_task(task_id, worker, args, \
+      callback, error_callback), self.loop)
+  async def run_task(self, task_id : int, worker : int, args : tuple, callback, \
+    error_callback):
+    try:
+      try:
+        res = await calc_obj_async(self, worker, *args)
+      except Exception as exc:
+        res = None
+        if error_callback is not None:
+          await self.loop.run_in_executor(self.callback_executor, error_callback, exc)
+      if res is not None and callback is not None:
+        await self.loop.run_in_executor(self.callback_executor, callback, res)
+    finally:
+      with self.cond:
+        del self._cache[task_id]
+        self.free_workers.append(worker)
+        self.cond.notify_all()
+  # Wait until fewer than a given number of tasks are pending, returns
+  # False if the timeout expired:
+  def wait_pending(self, task_num : int, timeout=None):
+    with self.cond:
+      return self.cond.wait_for(lambda: len(self._cache) < task_num, timeout)
+  # Kill running solvers, no new solvers are started afterwards:
+  def kill(self):
+    self.loop.call_soon_threadsafe(self.kill_in_loop)
+  def kill_in_loop(self):
+    self.is_killed = True
+    for proc in self.procs:
+      try:
+        proc.kill()
+      except ProcessLookupError:
+        pass
+  def close(self):
+    pass
+  def join(self):
+    self.wait_pending(1)
+    self.loop.call_soon_threadsafe(self.loop.stop)
+    self.thread.join()
+    self.loop.close()
+    self.callback_executor.shutdown()
 
-# Read all CNFs in a given folder:
+# Start calculating a point in a pool of workers:
+def start_point(pool, point : list):
+  global generated_points
+  global dispatch_times
+  global sh
+  assert(len(point) == len(params))
+  # Without a core, the point can be generated again later:
+  if not lease_core(pool):
+    generated_points[tuple(point)] = PointStatus.UNFINISHED
+    return
+  # Check the point's status:
+  tuple_point = tuple(point)
+  assert(generated_points[tuple_point] == PointStatus.GENERATED)
+  # Mark that the calculation is started:
+  generated_points[tuple_point] = PointStatus.STARTED
+  dispatch_times[tuple_point] = time.time()
+  point_cnfs = cnfs
+  if op.opt_alg == 'SH':
+    # Start points are processed on all CNFs:
+    point_cnfs = sh.rung_cnfs(sh.jobs.pop(tuple_point, sh.top_rung()))
+  pool.apply_async(calc_obj, args=(solver_name, best_sum_time, max_instance_time_best_point, op.max_solver_time, op.opt_alg, point_cnfs, params, point, op.is_solving, start_time, op.max_wall_time, op.staging_dir, op.staging_limit, speed_factor, op.objective), callback=leased(collect_result), \
+    error_callback=leased(functools.partial(collect_error, point, len(point_cnfs))))
+
+# Generate new points by the chosen algorithm. In the solving mode, fewer
+# points are generated if the space is exhausted:
+def ask_new_points(points_num_to_gen : int):
+  global is_space_exhausted
+  if op.is_solving:
+    if is_space_exhausted:
+      return []
+    new_points = ask_portfolio_points(portfolio, portfolio_queue, def_point, params, \
+      points_num_to_gen, generated_points, op.max_flips)
+    is_space_exhausted = len(new_points) < points_num_to_gen
+    return new_points
+  if op.opt_alg == 'SH':
+    return ask_sh_points(sh, op.sh_sampler, skt_opt, best_point, params, \
+      paramsdict, points_num_to_gen, generated_points)
+  return ask_points(op.opt_alg, skt_opt, best_point, params, paramsdict, \
+    points_num_to_gen, generated_points)
+
+# Read all CNFs in a given folder, including compressed ones:
 def read_cnfs(cnfs_folder_name : str):
   cnfs = list()
   os.chdir('.')
   for f in glob.glob(cnfs_folder_name + '/*.cnf'):
     assert('.cnf' in f)
     cnfs.append(f)
+  for ext in cnf_openers:
+    for f in glob.glob(cnfs_folder_name + '/*.cnf' + ext):
+      assert('.cnf' in f)
+      cnfs.append(f)
   return cnfs
 
+def is_compressed_cnf(cnf_file_name : str):
+  return os.path.splitext(cnf_file_name)[1] in cnf_openers
+
+# Default staging folder, in memory if possible:
+def default_staging_dir():
+  if os.path.isdir('/dev/shm'):
+    return '/dev/shm/bbo_staging'
+  return os.path.join(tempfile.gettempdir(), 'bbo_staging')
+
+# Name of a staged CNF. A hash of the full path avoids collisions of
+# CNFs with the same name from different folders:
+def staged_cnf_name(cnf_file_name : str, staging_dir : str):
+  base_name = os.path.basename(cnf_file_name)
+  if is_compressed_cnf(base_name):
+    base_name = os.path.splitext(base_name)[0]
+  path_hash = hashlib.md5(os.path.abspath(cnf_file_name).encode()).hexdigest()[:8]
+  return os.path.join(staging_dir, path_hash + '_' + base_name)
+
+# Decompress (or copy) a CNF to the staging folder if it is not there yet.
+# A per-CNF lock lets only one worker (of all tuners sharing the folder)
+# stage a CNF while the others wait for it:
+def stage_cnf(cnf_file_name : str, staging_dir : str, staging_limit : int):
+  staged_name = staged_cnf_name(cnf_file_name, staging_dir)
+  with open(staged_name + '.lock', 'w') as lock_file:
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    if os.path.exists(staged_name):
+      # Mark as recently used:
+      os.utime(staged_name)
+      return staged_name
+    tmp_name = staged_name + '.tmp' + str(os.getpid())
+    ext = os.path.splitext(cnf_file_name)[1]
+    opener = cnf_openers[ext] if ext in cnf_openers else open
+    with opener(cnf_file_name, 'rb') as src, open(tmp_name, 'wb') as dst:
+      shutil.copyfileobj(src, dst, 1 << 20)
+    os.rename(tmp_name, staged_name)
+  evict_staged_cnfs(staging_dir, staging_limit, staged_name)
+  return staged_name
+
+# Remove least recently used staged CNFs until the folder fits the limit (MB):
+def evict_staged_cnfs(staging_dir : str, staging_limit : int, keep_name : str):
+  with open(os.path.join(staging_dir, 'eviction.lock'), 'w') as lock_file:
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    staged = []
+    total_size = 0
+    for f in os.listdir(staging_dir):
+      if f.endswith('.lock') or '.tmp' in f:
+        continue
+      full_name = os.path.join(staging_dir, f)
+      try:
+        st = os.stat(full_name)
+      except FileNotFoundError:
+        continue
+      staged.append((st.st_mtime, st.st_size, full_name))
+      total_size += st.st_size
+    limit_bytes = staging_limit * 1024 * 1024
+    now = time.time()
+    for mtime, size, full_name in sorted(staged):
+      if total_size <= limit_bytes:
+        break
+      if full_name == keep_name or now - mtime < STAGING_GRACE_SEC:
+        continue
+      os.remove(full_name)
+      total_size -= size
+    if total_size > limit_bytes:
+      print('Warning: staged CNFs take ' + str(total_size // (1024 * 1024)) + \
+        ' MB, more than the limit ' + str(staging_limit) + ' MB')
+
 # String-representation of a given point:
 def strlistrepr(lst : list):
   assert(len(lst) > 1)
@@ -574,10 +1940,310 @@ def write_points(points : dict, cnfs : list):
       f.write(str(p))
       f.write('\n')
 
+# Accounting of the tuner's wall time per phase and of core-seconds.
+# Phases of the main thread:
+#   ask     - generating points (incl. skopt ask),
+#   respawn - creating and joining a pool of workers,
+#   kill    - killing solvers when a new best point is found or a limit is reached,
+#   wait    - polling sleeps while all cores are busy.
+# Phases of the result handler thread of a pool, overlapping with the above:
+#   collect - processing results of points (incl. skopt tell),
+#   tell    - fitting the skopt surrogate model.
+class Profiler:
+  def __init__(self, cpu_num : int):
+    self.cpu_num = cpu_num
+    self.start_time = time.time()
+    self.phase_sec = dict()
+    self.phase_calls = dict()
+    self.busy_core_sec = 0.0 # core-seconds spent on collected points
+    self.solver_sec = 0.0 # solver runtimes reported by the solver itself
+    self.preempted_core_sec = 0.0 # core-seconds lost on UNFINISHED points
+    self.preempted_num = 0
+    self.collected_num = 0 # collected evaluations
+    self.last_collect_time = self.start_time
+  def add(self, phase : str, sec : float):
+    if phase not in self.phase_sec:
+      self.phase_sec[phase] = 0.0
+      self.phase_calls[phase] = 0
+    self.phase_sec[phase] += sec
+    self.phase_calls[phase] += 1
+  def collect(self, run_info : dict):
+    self.collected_num += 1
+    self.last_collect_time = time.time()
+    self.busy_core_sec += run_info['finish'] - run_info['start']
+    for inst in run_info['instances']:
+      self.solver_sec += inst['time']
+  def preempt(self, sec : float):
+    self.preempted_core_sec += sec
+    self.preempted_num += 1
+  # Core-seconds available since the start:
+  def total_core_sec(self):
+    return (time.time() - self.start_time) * self.cpu_num
+  def idle_core_sec(self):
+    return max(0.0, self.total_core_sec() - self.busy_core_sec - \
+      self.preempted_core_sec)
+  def preempted_share(self):
+    used_sec = self.busy_core_sec + self.preempted_core_sec
+    return self.preempted_core_sec / used_sec if used_sec > 0 else 0.0
+  def to_dict(self):
+    return {'elapsed' : round(time.time() - self.start_time, 2), \
+      'cpu_num' : self.cpu_num, \
+      'phase_sec' : {ph : round(sec, 3) for ph, sec in self.phase_sec.items()}, \
+      'phase_calls' : self.phase_calls, \
+      'total_core_sec' : round(self.total_core_sec(), 2), \
+      'busy_core_sec' : round(self.busy_core_sec, 2), \
+      'solver_sec' : round(self.solver_sec, 2), \
+      'preempted_core_sec' : round(self.preempted_core_sec, 2), \
+      'preempted_num' : self.preempted_num, \
+      'idle_core_sec' : round(self.idle_core_sec(), 2)}
+  def __str__(self):
+    total_sec = self.total_core_sec()
+    def share(sec):
+      return ' (' + str(round(100 * sec / total_sec, 1)) + ' %)' if total_sec > 0 else ''
+    s = 'Tuner profile after ' + str(round(time.time() - self.start_time, 2)) + \
+      ' seconds on ' + str(self.cpu_num) + ' cores:\n'
+    for ph in sorted(self.phase_sec):
+      s += '  ' + ph + ' : ' + str(round(self.phase_sec[ph], 2)) + ' seconds, ' + \
+        str(self.phase_calls[ph]) + ' calls\n'
+    s += '  total core-seconds     : ' + str(round(total_sec, 2)) + '\n'
+    s += '  busy core-seconds      : ' + str(round(self.busy_core_sec, 2)) + \
+      share(self.busy_core_sec) + '\n'
+    s += '  solver seconds         : ' + str(round(self.solver_sec, 2)) + '\n'
+    s += '  preempted core-seconds : ' + str(round(self.preempted_core_sec, 2)) + \
+      share(self.preempted_core_sec) + ', ' + str(self.preempted_num) + ' points\n'
+    s += '  idle core-seconds      : ' + str(round(self.idle_core_sec(), 2)) + \
+      share(self.idle_core_sec()) + '\n'
+    s += '  share of solver core-seconds lost to UNFINISHED points : ' + \
+      str(round(100 * self.preempted_share(), 1)) + ' %'
+    return s
+
+# Append-only log of evaluations in the JSONL format, one event per line.
+# Lines are buffered and written by a single os.write() on an O_APPEND
+# descriptor, so lines from tuners sharing a log are not interleaved:
+class EventLog:
+  def __init__(self, file_name : str, run_id : str, flush_interval : float):
+    self.file_name = file_name
+    self.run_id = run_id
+    self.flush_interval = flush_interval
+    self.lines = []
+    self.last_flush_time = time.time()
+    self.fd = os.open(file_name, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    # Events are written by the main thread and by callbacks in the pool's thread:
+    self.lock = threading.RLock()
+  def write(self, event : dict):
+    event['run'] = self.run_id
+    event['time'] = round(time.time(), 3)
+    with self.lock:
+      self.lines.append(json.dumps(event))
+      if time.time() - self.last_flush_time >= self.flush_interval:
+        self.flush()
+  def flush(self):
+    with self.lock:
+      if len(self.lines) > 0:
+        os.write(self.fd, ('\n'.join(self.lines) + '\n').encode())
+        self.lines = []
+      self.last_flush_time = time.time()
+  def close(self):
+    self.flush()
+    os.close(self.fd)
+
+# Leases of CPU cores from the scheduler of multi_study.py, which shares a
+# core budget among tuners. A core is leased by the main thread before a
+# calculation is started, and it is returned by the calculation's callback,
+# so the scheduler gives free cores to studies which have pending work.
+# Leases which are held when the connection is closed are returned too:
+class CoreLeases:
+  def __init__(self, address : str, study_name : str):
+    from multiprocessing.connection import Client
+    key = os.environ.get(SCHEDULER_KEY_ENV, '')
+    self.conn = Client(address, authkey=bytes.fromhex(key) if key != '' else None)
+    # Callbacks are called in other threads:
+    self.lock = threading.Lock()
+    # Requests which were given up on, their grants are taken by next ones:
+    self.pending_num = 0
+    self.send(('hello', study_name))
+  def send(self, msg : tuple):
+    with self.lock:
+      self.conn.send(msg)
+  # Wait until a core is granted, calling on_wait() every second. Returns
+  # False if is_stopped() became true before, then the request stays pending:
+  def acquire(self, on_wait, is_stopped):
+    if self.pending_num == 0:
+      self.send(('acquire', 1))
+    else:
+      self.pending_num -= 1
+    while not self.conn.poll(1):
+      on_wait()
+      if is_stopped():
+        self.pending_num += 1
+        return False
+    assert(self.conn.recv() == 'grant')
+    return True
+  def release(self):
+    self.send(('release', 1))
+  def close(self):
+    self.conn.close()
+
+# Lease a core for a new calculation if a scheduler is used. While waiting,
+# metrics are updated, and the wait is given up (False is returned) if the
+# time limit is reached or, given a pool, the search stagnates:
+def lease_core(pool=None):
+  if leases is None:
+    return True
+  def on_wait():
+    if pool is not None:
+      update_metrics(pool)
+  def is_stopped():
+    if time.time() - start_time >= op.max_wall_time:
+      return True
+    return pool is not None and is_stagnated(processed(generated_points))
+  return leases.acquire(on_wait, is_stopped)
+
+# A callback of a calculation which also returns its leased core:
+def leased(callback):
+  if leases is None:
+    return callback
+  def leased_callback(res):
+    try:
+      callback(res)
+    finally:
+      leases.release()
+  return leased_callback
+
+# Report a calculation which raised an exception:
+def report_error(exc):
+  print('Calculation failed : ' + repr(exc))
+
+# Live metrics in the Prometheus text format. The main thread renders a
+# snapshot, which is served on a local HTTP port and/or written to a
+# textfile (e.g. for node_exporter's textfile collector). The textfile is
+# replaced by a rename, so a scraper never reads a partial file:
+class MetricsExporter:
+  def __init__(self, port : int, file_name : str):
+    self.file_name = file_name
+    self.text = ''
+    self.last_update_time = 0.0
+    self.server = None
+    if port > 0:
+      exporter = self
+      class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+          body = exporter.text.encode()
+          self.send_response(200)
+          self.send_header('Content-Type', 'text/plain; version=0.0.4')
+          self.send_header('Content-Length', str(len(body)))
+          self.end_headers()
+          self.wfile.write(body)
+        def log_message(self, format, *args):
+          pass
+      self.server = http.server.ThreadingHTTPServer(('127.0.0.1', port), Handler)
+      threading.Thread(target=self.server.serve_forever, daemon=True).start()
+  def is_due(self):
+    return time.time() - self.last_update_time >= METRICS_INTERVAL
+  def update(self, text : str):
+    self.text = text
+    self.last_update_time = time.time()
+    if self.file_name != '':
+      tmp_file_name = self.file_name + '.tmp'
+      with open(tmp_file_name, 'w') as f:
+        f.write(text)
+      os.replace(tmp_file_name, self.file_name)
+  def close(self):
+    if self.server is not None:
+      self.server.shutdown()
+      self.server.server_close()
+
+# Metrics of the tuner in the Prometheus text format, given the number of
+# busy worker slots:
+def metrics_text(busy_num : int):
+  labels = '{run="' + event_log.run_id + '"}'
+  def labeled(name : str, value : str):
+    return '{run="' + event_log.run_id + '",' + name + '="' + value + '"}'
+  lines = []
+  def metric(name : str, kind : str, help_str : str, samples : list):
+    lines.append('# HELP ' + name + ' ' + help_str)
+    lines.append('# TYPE ' + name + ' ' + kind)
+    for suffix, sample_labels, value in samples:
+      lines.append(name + suffix + sample_labels + ' ' + repr(float(value)))
+  elapsed = time.time() - start_time
+  statuses = Counter(generated_points.values())
+  metric('bbo_points', 'gauge', 'Generated points by status.', \
+    [('', labeled('status', st.name), statuses[st]) for st in PointStatus])
+  metric('bbo_evaluations_total', 'counter', 'Collected evaluations of points.', \
+    [('', labels, profiler.collected_num)])
+  metric('bbo_evaluations_per_second', 'gauge', 'Mean rate of collected evaluations.', \
+    [('', labels, profiler.collected_num / elapsed if elapsed > 0 else 0)])
+  metric('bbo_last_evaluation_timestamp_seconds', 'gauge', \
+    'Unix time of the last collected evaluation.', [('', labels, profiler.last_collect_time)])
+  metric('bbo_best_sum_time', 'gauge', 'Objective value of the best point (-1 if unknown).', \
+    [('', labels, best_sum_time)])
+  metric('bbo_best_updates_total', 'counter', 'Updates of the best point.', \
+    [('', labels, updates_num)])
+  metric('bbo_last_best_update_timestamp_seconds', 'gauge', \
+    'Unix time of the last update of the best point.', [('', labels, last_update_time)])
+  busy_num = min(busy_num, op.cpu_num)
+  metric('bbo_workers', 'gauge', 'Worker slots by state.', \
+    [('', labeled('state', 'busy'), busy_num), ('', labeled('state', 'idle'), op.cpu_num - busy_num)])
+  metric('bbo_solver_cpu_seconds_total', 'counter', 'Solver runtimes reported by the solver.', \
+    [('', labels, profiler.solver_sec)])
+  metric('bbo_busy_core_seconds_total', 'counter', 'Core-seconds spent on collected points.', \
+    [('', labels, profiler.busy_core_sec)])
+  metric('bbo_preempted_core_seconds_total', 'counter', \
+    'Core-seconds lost on points killed because of a new best point.', \
+    [('', labels, profiler.preempted_core_sec)])
+  metric('bbo_surrogate_fit_seconds', 'summary', 'Latency of fitting the surrogate model.', \
+    [('_sum', labels, profiler.phase_sec.get('tell', 0.0)), \
+     ('_count', labels, profiler.phase_calls.get('tell', 0))])
+  metric('bbo_phase_seconds_total', 'counter', 'Wall time of the tuner per phase.', \
+    [('', labeled('phase', ph), sec) for ph, sec in sorted(profiler.phase_sec.items())])
+  metric('bbo_elapsed_seconds', 'gauge', 'Wall time since the start.', [('', labels, elapsed)])
+  return '\n'.join(lines) + '\n'
+
+# Refresh live metrics if they are due:
+def update_metrics(pool):
+  if metrics is not None and metrics.is_due():
+    metrics.update(metrics_text(len(pool._cache)))
+
+# Read evaluations from a JSONL event log.
+# An incomplete last line of a log of a running tuner is skipped:
+def read_history(file_name : str, run_id=''):
+  evals = []
+  with open(file_name, 'r') as f:
+    for line in f:
+      try:
+        event = json.loads(line)
+      except json.JSONDecodeError:
+        continue
+      if event['event'] != 'eval':
+        continue
+      if run_id != '' and event['run'] != run_id:
+        continue
+      evals.append(event)
+  return evals
+
+# Evaluations of the latest run in an event log which has evaluations, and
+# the number of CNFs of the run from its start event (-1 if there is none):
+def read_latest_run(file_name : str):
+  cnfs_nums = dict()
+  run_id = ''
+  with open(file_name, 'r') as f:
+    for line in f:
+      try:
+        event = json.loads(line)
+      except json.JSONDecodeError:
+        continue
+      if event['event'] == 'start':
+        cnfs_nums[event['run']] = len(event['cnfs'])
+      elif event['event'] == 'eval':
+        run_id = event['run']
+  if run_id == '':
+    return [], -1
+  return read_history(file_name, run_id), cnfs_nums.get(run_id, -1)
+
 # Write final best point as a pcs file:
-def write_final_pcs(best_point : list, params : list, cnfs : list):
+def write_final_pcs(best_point : list, params : list, cnfs : list, \
+  outname='final_best.pcs'):
   assert(len(best_point) == len(params))
-  outname = 'final_best.pcs'
   #for x in cnfs:
     #assert('.cnf' in x)
     #outname += os.path.basename(x.split('.cnf')[0])
@@ -596,7 +2262,8 @@ def processed(generated_points : dict):
   res = 0
   for point_tuple in generated_points:
      if generated_points[point_tuple] == PointStatus.FINISHED or \
-     generated_points[point_tuple] == PointStatus.INTERRUPTED:
+     generated_points[point_tuple] == PointStatus.INTERRUPTED or \
+     generated_points[point_tuple] == PointStatus.FAILED:
         res += 1
   return res
 
@@ -621,6 +2288,7 @@ def stat(generated_points : dict):
   finished_num = 0
   interrupted_num = 0
   unfinished_num = 0
+  failed_num = 0
   for point_tuple in generated_points:
       if generated_points[point_tuple] == PointStatus.GENERATED:
          generated_num += 1
@@ -632,13 +2300,149 @@ def stat(generated_points : dict):
          interrupted_num += 1
       elif generated_points[point_tuple] == PointStatus.UNFINISHED:
          unfinished_num += 1
+      elif generated_points[point_tuple] == PointStatus.FAILED:
+         failed_num += 1
   res = str(generated_num) + ' generated\n' + \
     str(started_num) + ' started\n' + \
     str(finished_num) + ' finished\n' + \
     str(interrupted_num) + ' interrupted\n' + \
-    str(unfinished_num) + ' unfinished\n'
+    str(unfinished_num) + ' unfinished\n' + \
+    str(failed_num) + ' failed\n'
   return res
 
+# Best distinct points from a history of evaluations, with their best sum time.
+# Given the number of CNFs, only evaluations on all of them are ranked, since
+# sum times of lower rungs of successive halving are on fewer CNFs:
+def top_points(history : list, k : int, cnfs_num=-1):
+  best_times = dict()
+  for e in history:
+    if e['status'] != 'FINISHED':
+      continue
+    if cnfs_num > 0 and e.get('fidelity', cnfs_num) != cnfs_num:
+      continue
+    tuple_point = tuple(e['point'])
+    if tuple_point not in best_times or e['sum_time'] < best_times[tuple_point]:
+      best_times[tuple_point] = e['sum_time']
+  ranked = sorted(best_times.items(), key=lambda x: x[1])
+  return [(list(tp), sum_time) for tp, sum_time in ranked[:k]]
+
+# Two-sided Wilcoxon signed-rank test of paired samples, normal approximation
+# with the tie correction. Returns the p-value:
+def wilcoxon_signed_rank(x : list, y : list):
+  assert(len(x) == len(y))
+  d = [a - b for a, b in zip(x, y) if a != b]
+  n = len(d)
+  if n == 0:
+    return 1.0
+  order = sorted(range(n), key=lambda i: abs(d[i]))
+  ranks = [0.0 for _ in range(n)]
+  tie_term = 0
+  i = 0
+  while i < n:
+    j = i
+    while j + 1 < n and abs(d[order[j + 1]]) == abs(d[order[i]]):
+      j += 1
+    for l in range(i, j + 1):
+      ranks[order[l]] = (i + j) / 2 + 1
+    tie_term += (j - i + 1)**3 - (j - i + 1)
+    i = j + 1
+  w_plus = sum(ranks[i] for i in range(n) if d[i] > 0)
+  mean = n * (n + 1) / 4
+  var = n * (n + 1) * (2 * n + 1) / 24 - tie_term / 48
+  if var <= 0:
+    return 1.0
+  z = (abs(w_plus - mean) - 0.5) / math.sqrt(var)
+  return math.erfc(max(z, 0) / math.sqrt(2))
+
+# Run a solver on a given point, CNF and seed, returns the run's status:
+def calc_validation_run(solver_name : str, params : list, point_indx : int, \
+  point : list, cnf_file_name : str, rep : int, solver_time_lim : float, \
+  staging_dir : str, staging_limit : int, objective='time'):
+  t, status, cdcl_log, sys_str = run_solver(solver_name, params, point, \
+    cnf_file_name, solver_time_lim, staging_dir, staging_limit, \
+    '--seed=' + str(rep) + ' ', objective)
+  if status in SOLVED_RUN_STATUSES and solver_time_lim > 0 and t >= solver_time_lim:
+    status = RunStatus.TIMEOUT
+  return point_indx, cnf_file_name, rep, t, status
+
+# Runtime charged to an unsolved (timed out or failed) run: PAR2 of the
+# solver's time limit or, without it, twice the worst runtime of solved runs,
+# as the tuner's penalty. Runs are given as (runtime, is_solved):
+def unsolved_penalty(max_solver_time : float, runs : list):
+  if max_solver_time > 0:
+    return 2 * max_solver_time
+  solved_times = [t for t, is_solved in runs if is_solved]
+  # If nothing is solved, the worst runtime of all runs is taken:
+  return 2 * max(solved_times if len(solved_times) > 0 else [t for t, _ in runs])
+
+# Validate the default point and the best points from a history on given CNFs.
+# All (point, CNF, seed) runs are processed in parallel. Unsolved runs get
+# the penalty of unsolved_penalty() as runtime:
+def validate(solver_name : str, params : list, def_point : list, cnfs : list, \
+  op : Options, cpu_sets : list):
+  history_file = op.history_file if op.history_file != '' else op.event_log_file
+  print('Reading history from file ' + history_file)
+  history, history_cnfs_num = read_latest_run(history_file)
+  print(str(len(history)) + ' evaluations of the latest run in the history')
+  points = [def_point]
+  for p, sum_time in top_points(history, op.top_k + 1, history_cnfs_num):
+    if p != def_point and len(points) <= op.top_k:
+      points.append(p)
+      print('Point ' + str(len(points) - 1) + ' with training sum time ' + str(sum_time))
+  print(str(len(points) - 1) + ' points will be compared with the default one')
+  tasks = []
+  for rep in range(op.val_reps):
+    for cnf in cnfs:
+      for i in range(len(points)):
+        tasks.append((solver_name, params, i, points[i], cnf, rep, \
+          op.max_solver_time, op.staging_dir, op.staging_limit))
+  print(str(len(tasks)) + ' solver runs on ' + str(op.cpu_num) + ' CPU cores')
+  with make_pool(op.cpu_num, cpu_sets) as pool:
+    results = pool.starmap(calc_validation_run, tasks)
+  penalty = unsolved_penalty(op.max_solver_time, \
+    [(t, status in SOLVED_RUN_STATUSES) for _, _, _, t, status in results])
+  times = [dict() for _ in points]
+  unsolved = [0 for _ in points]
+  for i, cnf, rep, t, status in results:
+    if status not in SOLVED_RUN_STATUSES:
+      unsolved[i] += 1
+      t = penalty
+    times[i].setdefault(cnf, []).append(t)
+  # Mean runtime per CNF over seeds:
+  mean_times = [[sum(times[i][cnf]) / len(times[i][cnf]) for cnf in cnfs] \
+    for i in range(len(points))]
+  lines = []
+  lines.append('Runtime of an unsolved run : ' + str(round(penalty, 2)))
+  lines.append('Default point : sum time ' + str(round(sum(mean_times[0]), 2)) + \
+    ' , ' + str(unsolved[0]) + ' unsolved runs')
+  for i in range(1, len(points)):
+    speedups = [d / t for d, t in zip(mean_times[0], mean_times[i])]
+    gmean = math.exp(sum(math.log(x) for x in speedups) / len(speedups))
+    p_value = wilcoxon_signed_rank([math.log(t) for t in mean_times[0]], \
+      [math.log(t) for t in mean_times[i]])
+    lines.append('')
+    lines.append('Point ' + str(i) + ' : sum time ' + str(round(sum(mean_times[i]), 2)) + \
+      ' , ' + str(unsolved[i]) + ' unsolved runs')
+    lines.append('  geometric mean speedup : ' + str(round(gmean, 3)))
+    lines.append('  faster on ' + str(sum(1 for x in speedups if x > 1)) + ' CNFs, slower on ' + \
+      str(sum(1 for x in speedups if x < 1)) + ' CNFs out of ' + str(len(cnfs)))
+    lines.append('  Wilcoxon signed-rank p-value : ' + str(round(p_value, 4)) + \
+      ' , unsolved runs : ' + str(unsolved[i]) + ' vs ' + str(unsolved[0]) + ' of the default point')
+    lines.append('  per-CNF speedups :')
+    for cnf, x in zip(cnfs, speedups):
+      lines.append('    ' + cnf + ' : ' + str(round(x, 3)))
+    diff_str = points_diff(def_point, points[i], params)
+    lines.append('  difference from the default point :')
+    lines.append(diff_str if diff_str != '' else '  none')
+  report_name = 'validation.txt'
+  print('')
+  for line in lines:
+    print(line)
+  print('Writing validation report to file ' + report_name)
+  with open(report_name, 'w') as f:
+    for line in lines:
+      f.write(line + '\n')
+
 # Main function:
 if __name__ == '__main__':
   if len(sys.argv) < 4:
@@ -661,6 +2465,26 @@ if __name__ == '__main__':
   op.read(sys.argv[3:])
   print(op)
 
+  # With binding, do not oversubscribe the machine:
+  topology = read_cpu_topology(op.is_no_smt)
+  print(str(len(topology)) + ' CPUs are available' + \
+    (' without SMT siblings' if op.is_no_smt else ''))
+  if op.cpu_num > len(topology):
+    print(('Error: ' if op.affinity != 'none' else 'Warning: ') + \
+      str(op.cpu_num) + ' CPU cores are requested, but ' + \
+      str(len(topology)) + ' are available')
+    if op.affinity != 'none':
+      exit(1)
+  cpu_sets = []
+  if op.affinity != 'none':
+    claimed = claim_cpus(topology, op.cpu_num)
+    if len(claimed) == 0:
+      print('Error: not enough CPUs are left unclaimed by other tuners for ' + \
+        str(op.cpu_num) + ' workers')
+      exit(1)
+    cpu_sets = worker_cpu_sets(claimed, op.affinity)
+    print('Workers are bound to CPU sets : ' + str(cpu_sets))
+
   # Force the seed depend on wall time and number of CPU cores.
   # + 1 is needed to avoid multiplying by 0 if the base seed is 0.
   seed = (op.seed + 1) * op.max_wall_time * op.cpu_num + optalg_indices[op.opt_alg]
@@ -675,16 +2499,25 @@ if __name__ == '__main__':
 
   params = read_pcs(param_file_name)
 
-  skt_opt_space=[]
-  # space.append(Integer(0, 10, name='x2'))
-  for param in params:
-     skt_opt_space.append(Categorical(param.values, name=param.name))
+  profiler = Profiler(op.cpu_num)
+  event_log = EventLog(op.event_log_file, random_str + '-' + str(os.getpid()), \
+    op.flush_interval)
+  print('Evaluations are logged to file ' + op.event_log_file)
+  metrics = None
+  if op.metrics_port > 0 or op.metrics_file != '':
+    metrics = MetricsExporter(op.metrics_port, op.metrics_file)
+    if op.metrics_port > 0:
+      print('Live metrics are served on http://127.0.0.1:' + str(op.metrics_port) + '/metrics')
+    if op.metrics_file != '':
+      print('Live metrics are written to file ' + op.metrics_file)
+  leases = None
+  if op.scheduler != '':
+    study_name = os.environ.get(SCHEDULER_STUDY_ENV, 'study-' + str(os.getpid()))
+    leases = CoreLeases(op.scheduler, study_name)
+    print('Cores are leased from scheduler ' + op.scheduler + ' as study ' + study_name)
 
-  estimator_type = 'GP'
-  if op.opt_alg != "1+1":
-     estimator_type = op.opt_alg
-     print('sktopt estimator type : ' + estimator_type)
-  skt_opt = Optimizer(skt_opt_space, base_estimator=estimator_type, n_initial_points=10, random_state=seed)
+  sampler = op.sh_sampler if op.opt_alg == 'SH' else op.opt_alg
+  skt_opt = optimizer_backends[sampler](params, op.is_cost_aware, seed)
 
   def_point = list()
   total_val_num = 0
@@ -713,9 +2546,78 @@ if __name__ == '__main__':
   print(str(len(cnfs)) + ' CNFs were read :')
   for cnf in cnfs:
     print(cnf)
+  if op.staging_dir == '' and any(is_compressed_cnf(cnf) for cnf in cnfs):
+    op.staging_dir = default_staging_dir()
+  if op.staging_dir != '':
+    os.makedirs(op.staging_dir, exist_ok=True)
+    print('CNFs are staged in folder ' + op.staging_dir + ' limited by ' + \
+      str(op.staging_limit) + ' MB')
 
-  penalty_sum_time = op.max_solver_time * cnfs_num
-  print('Interrupted points will get sum_time (obj func value) ' + str(penalty_sum_time) + ' seconds')
+  event_log.write({'event' : 'start', 'version' : version, \
+    'solver' : solver_name, 'pcs' : param_file_name, 'options' : vars(op), \
+    'params' : [prm.name for prm in params], \
+    'values' : [prm.values for prm in params], 'default' : def_point, \
+    'cnfs' : cnfs})
+  event_log.flush()
+
+  if op.is_validating:
+    validate(solver_name, params, def_point, cnfs, op, cpu_sets)
+    event_log.close()
+    exit(0)
+
+  # Machine-speed calibration at the start:
+  speed_factor = 1.0
+  calib_ref = op.calib_ref
+  calib_times = []
+  last_calib_time = time.time()
+  if op.calib_cnf != '':
+    print('Calibrating on CNF ' + op.calib_cnf)
+    for _ in range(CALIB_WINDOW):
+      if not lease_core():
+        break
+      t, status, cdcl_log, sys_str = run_solver(solver_name, params, def_point, \
+        op.calib_cnf, -1, op.staging_dir, op.staging_limit)
+      assert(status in SOLVED_RUN_STATUSES)
+      update_speed_factor(t)
+      if leases is not None:
+        leases.release()
+
+  # Robust acceptance of new best points:
+  noise = NoiseModel(PRIOR_RUNTIME_NOISE)
+  # Candidate point tuple -> (point, command):
+  candidates = dict()
+  remeasure_queue = []
+  remeasure_started = []
+  remeasure_lock = threading.Lock()
+  # Point -> number of failed re-measurements:
+  remeasure_failures = dict()
+  # Whether solvers are being killed because of a break of the inner loop:
+  is_killing_solvers = False
+
+  portfolio = []
+  if op.is_solving and op.portfolio_file != '':
+    print('Reading portfolio points from file ' + op.portfolio_file)
+    history, history_cnfs_num = read_latest_run(op.portfolio_file)
+    strong_points = [p for p, _ in top_points(history, PORTFOLIO_POINTS_PER_CORE * op.cpu_num, \
+      history_cnfs_num) if is_in_space(p, params)]
+    portfolio = diverse_order(strong_points)
+    print(str(len(portfolio)) + ' portfolio points from past runs')
+  portfolio_queue = list(portfolio)
+
+  sh = None
+  if op.opt_alg == 'SH':
+    sh = SuccessiveHalving(cnfs, op.min_fidelity, op.eta)
+    print('Successive halving fidelities (numbers of CNFs) : ' + str(sh.fids))
+
+  # Without a solver's time limit, the penalty is set when points are finished:
+  penalty_sum_time = op.max_solver_time * cnfs_num if op.max_solver_time > 0 else -1
+  # The worst cost told to the cost-aware surrogate model:
+  worst_eval_cost = 0.0
+  if penalty_sum_time > 0:
+    print('Interrupted and failed points will get sum_time (obj func value) ' + \
+      str(penalty_sum_time) + ' seconds')
+  else:
+    print('Interrupted and failed points will get twice the worst sum_time (obj func value)')
 
   best_point = copy.deepcopy(def_point)
   # Command for default point:
@@ -733,7 +2635,14 @@ if __name__ == '__main__':
   # A dictionary of generated points, where a tuple representation of the
   # point's parameters values is an ID, while the VALUE is a point's status:
   generated_points = dict()
+  # Wall time when the calculation of a point is started:
+  dispatch_times = dict()
+  last_profile_time = time.time()
   start_points = []
+  # Without a given runtime on the default point, it is measured in parallel
+  # before the search, unless there is no time for it:
+  is_baseline = default_sum_time <= 0 and op.baseline_reps > 0 and \
+    not op.is_solving and op.max_wall_time > 0
   # In runtime on default point is given, mark it as finished:
   if default_sum_time > 0:
     processed_points_num = 1 # the default point is processed
@@ -742,43 +2651,93 @@ if __name__ == '__main__':
     assert(len(generated_points) == 1)
     assert(default_sum_time > 0)
     print('The default point is marked as finished.')
-  else:
+  elif not is_baseline:
     # otherwise, add the default point to the queue for processing:
     start_points.append(def_point) # earlier, sat- and unsat- points from Kissat were added here
 
   skipped_points_num = 0
   skipped_impos_num = 0
   repeatedly_generated_points = 0
+  # Expected number of changed parameters in (1+1) and its multiplier when
+  # the neighbourhood of the best point is exhausted:
+  mutation_rate = 1.0
+  escalation = 1
   updates_num = 0
   iter = 0
   max_instance_time_best_point = op.max_solver_time
+  # Restarts on stagnation, the global best point is kept separately:
+  global_best = (best_point, best_sum_time, max_instance_time_best_point, best_command)
+  elite = []
+  restarts_num = 0
+  last_update_time = time.time()
+  last_update_points = 0
+  last_restart_time = 0
   is_extern_break = False
+  is_space_exhausted = False
   elapsed_time = 0
 
+  # Baseline of the default point:
+  if is_baseline:
+    tuple_point = tuple(def_point)
+    generated_points[tuple_point] = PointStatus.STARTED
+    dispatch_times[tuple_point] = time.time()
+    baseline_sum_time, baseline_max_time, run_info = measure_baseline()
+    processed_points_num = 1
+    if baseline_sum_time > 0:
+      generated_points[tuple_point] = PointStatus.FINISHED
+      update_best(def_point, baseline_sum_time, baseline_max_time, best_command)
+      sampler = op.sh_sampler if op.opt_alg == 'SH' else op.opt_alg
+      if sampler != '1+1':
+        tell_point(def_point, baseline_sum_time, run_info['instances'])
+      if op.opt_alg == 'SH':
+        sh.record(tuple_point, sh.top_rung(), baseline_sum_time)
+    elif run_info['failure'] != '':
+      generated_points[tuple_point] = PointStatus.FAILED
+      print('The default point failed on the baseline with ' + run_info['failure'])
+    else:
+      generated_points[tuple_point] = PointStatus.INTERRUPTED
+      print('The default point is interrupted on the baseline')
+    event = {'event' : 'eval', 'point' : def_point, \
+      'status' : generated_points[tuple_point].name, 'sum_time' : baseline_sum_time, \
+      'max_time' : baseline_max_time}
+    event.update(run_info)
+    event_log.write(event)
+
   # Repeat until all points a processed:
   while processed_points_num < op.max_points and elapsed_time < op.max_wall_time:
     print('\n*** iter : ' + str(iter))
     elapsed_time = round(time.time() - start_time, 2)
     print('elapsed : ' + str(elapsed_time) + ' seconds')
     points_to_process = []
-    # Process start points only on the first iteration:
-    if iter == 0:
-      for p in start_points:
-        assert(len(p) == len(params))
-        points_to_process.append(p)
-        tuple_point = tuple(p)
-        generated_points[tuple_point] = PointStatus.GENERATED  
-    needed_new_points_num = op.cpu_num - len(points_to_process)
+    # Process start points on the first iteration and after restarts:
+    for p in start_points:
+      assert(len(p) == len(params))
+      points_to_process.append(p)
+      tuple_point = tuple(p)
+      generated_points[tuple_point] = PointStatus.GENERATED  
+    start_points = []
+    # Re-measurements of candidates killed in the previous iteration:
+    with remeasure_lock:
+      remeasure_queue[:0] = remeasure_started
+      remeasure_started.clear()
+    remeasures_to_start = take_remeasures(op.cpu_num - len(points_to_process))
+    needed_new_points_num = op.cpu_num - len(points_to_process) - len(remeasures_to_start)
     assert(needed_new_points_num >= 0)
     assert(needed_new_points_num <= op.cpu_num)
     # If at least one (1+1) point is required:
     new_points = []
     if needed_new_points_num > 0:
-      new_points = ask_points(op.opt_alg, skt_opt, best_point, params, paramsdict, needed_new_points_num, generated_points)
+      ask_start_time = time.time()
+      new_points = ask_new_points(needed_new_points_num)
+      profiler.add('ask', time.time() - ask_start_time)
       for p in new_points:
         assert(len(p) == len(params))
         points_to_process.append(p)
-    assert(len(points_to_process) == op.cpu_num)
+    assert(len(points_to_process) + len(remeasures_to_start) == op.cpu_num or \
+      is_space_exhausted)
+    if len(points_to_process) + len(remeasures_to_start) == 0:
+      print('No points to process, break main loop')
+      break
     is_def_point_to_process = False
     for p in points_to_process:
        if p == def_point:
@@ -787,24 +2746,37 @@ if __name__ == '__main__':
     print('of them ' + str(len(new_points)) + ' newly generated points')
     if is_def_point_to_process:
       print('of them 1 default point to process')
-    assert(len(points_to_process) == op.cpu_num)
-    pool = mp.Pool(op.cpu_num)
+    if len(remeasures_to_start) > 0:
+      print(str(len(remeasures_to_start)) + ' points to re-measure')
+    respawn_start_time = time.time()
+    if op.backend == 'asyncio':
+      pool = AsyncSolverPool(op.cpu_num, cpu_sets)
+    else:
+      pool = make_pool(op.cpu_num, cpu_sets)
+    profiler.add('respawn', time.time() - respawn_start_time)
     is_updated = False
     # Start processing the first batch of points:
     for p in points_to_process:
-      assert(len(p) == len(params))
-      # Check the point's status:
-      tuple_point = tuple(p)
-      assert(generated_points[tuple_point] == PointStatus.GENERATED)
-      # Mark that the calculation is started:
-      generated_points[tuple_point] = PointStatus.STARTED
-      pool.apply_async(calc_obj, args=(solver_name, best_sum_time, max_instance_time_best_point, op.max_solver_time, op.opt_alg, cnfs, params, p, op.is_solving, start_time, op.max_wall_time), callback=collect_result)
+      start_point(pool, p)
+    for p in remeasures_to_start:
+      start_remeasure(pool, p)
     is_inner_break = False
     # Repeat until a new record is found or the processed points limit is reached:
     while True:
+      wait_start_time = time.time()
+      if op.backend == 'asyncio':
+        while not pool.wait_pending(op.cpu_num, 1):
+          update_metrics(pool)
       while len(pool._cache) >= op.cpu_num: # wait until any CPU core is free
+        update_metrics(pool)
         time.sleep(1)
+      update_metrics(pool)
+      profiler.add('wait', time.time() - wait_start_time)
       elapsed_time = round(time.time() - start_time, 2)
+      if op.profile_interval > 0 and time.time() - last_profile_time >= op.profile_interval:
+        print(profiler)
+        event_log.write({'event' : 'profile', 'profile' : profiler.to_dict()})
+        last_profile_time = time.time()
       processed_points_num = processed(generated_points)
       if processed_points_num % 100 == 0 and processed_points_num != prev_processed_points_num:
         assert(processed_points_num > prev_processed_points_num)
@@ -817,6 +2789,13 @@ if __name__ == '__main__':
       elif elapsed_time >= op.max_wall_time:
         print('The time limit is reached, break.')
         is_inner_break = True
+      elif is_space_exhausted and len(pool._cache) == 0:
+        print('All points of the space are processed, break.')
+        is_inner_break = True
+        is_extern_break = True
+      if is_stagnated(processed_points_num):
+        restart_search(processed_points_num)
+        is_inner_break = True
       if is_updated:
         assert(best_sum_time > 0)
         if op.is_solving:
@@ -825,33 +2804,80 @@ if __name__ == '__main__':
           assert(iter == 0)
           is_extern_break = True
         is_updated = False
-        is_inner_break = True
+        # Successive halving goes on with lower rungs, the new best sum time
+        # is used for caps of new points:
+        if op.opt_alg != 'SH':
+          is_inner_break = True
       if is_inner_break:
         print('Break inner loop.')
         # Don't kill solver in the sequential mode:
-        if op.cpu_num > 1:
+        kill_start_time = time.time()
+        is_killing_solvers = True
+        if op.cpu_num > 1 and op.backend == 'asyncio':
+          mark_unfinished(generated_points, dispatch_times, profiler)
+          pool.kill()
+          pool.wait_pending(1)
+        elif op.cpu_num > 1:
           while len(pool._cache) > 0:
-            kill_solver(solver_name, generated_points)
+            kill_solver(solver_name, generated_points, dispatch_times, profiler)
             time.sleep(1)
+        profiler.add('kill', time.time() - kill_start_time)
+        respawn_start_time = time.time()
         pool.close()
         pool.join()
+        is_killing_solvers = False
+        profiler.add('respawn', time.time() - respawn_start_time)
         break
-      # A CPU core is free, so generate a new point and process it:
-      one_point_list = ask_points(op.opt_alg, skt_opt, best_point, params, paramsdict, 1, generated_points)
-      assert(len(one_point_list) == 1)
-      # Check the point's status:
-      tuple_point = tuple(one_point_list[0])
-      assert(generated_points[tuple_point] == PointStatus.GENERATED)
-      # Mark that the calculation is started:
-      generated_points[tuple_point] = PointStatus.STARTED
-      pool.apply_async(calc_obj, args=(solver_name, best_sum_time, max_instance_time_best_point, op.max_solver_time, op.opt_alg, cnfs, params, one_point_list[0], op.is_solving, start_time, op.max_wall_time), callback=collect_result)
+      # A CPU core is free, a due calibration goes first:
+      if op.calib_cnf != '' and op.calib_interval > 0 and \
+        time.time() - last_calib_time >= op.calib_interval:
+        start_calibration(pool)
+        last_calib_time = time.time()
+        continue
+      # Then re-measurements:
+      remeasures_to_start = take_remeasures(1)
+      if len(remeasures_to_start) > 0:
+        start_remeasure(pool, remeasures_to_start[0])
+        continue
+      # Otherwise, generate a new point and process it:
+      ask_start_time = time.time()
+      one_point_list = ask_new_points(1)
+      profiler.add('ask', time.time() - ask_start_time)
+      if len(one_point_list) == 0:
+        # The space is exhausted, wait for pending calculations:
+        if op.backend == 'asyncio':
+          pool.wait_pending(len(pool._cache), 1)
+        else:
+          time.sleep(1)
+        continue
+      start_point(pool, one_point_list[0])
     if is_extern_break:
        print('Break main loop')
        break
     iter += 1
 
+  # After restarts, the incumbent might be not the global best point:
+  if restarts_num > 0:
+    best_point, best_sum_time, max_instance_time_best_point, best_command = global_best
+    print(str(restarts_num) + ' restarts on stagnation')
+
   # Write generated points:
   write_points(generated_points, cnfs)
+  event_log.write({'event' : 'profile', 'profile' : profiler.to_dict()})
+  event_log.write({'event' : 'end', 'best' : best_point, \
+    'sum_time' : best_sum_time, 'updates' : updates_num})
+  event_log.close()
+  if leases is not None:
+    leases.close()
+  # The final snapshot of live metrics, all workers are idle:
+  if metrics is not None:
+    metrics.update(metrics_text(0))
+    metrics.close()
+  if op.columnar_dir != '':
+    from history import convert_event_log
+    evals_num = convert_event_log(op.event_log_file, op.columnar_dir, event_log.run_id)
+    print(str(evals_num) + ' evaluations are written in the columnar format to folder ' + \
+      op.columnar_dir)
 
   # Write final pcs file:
   write_final_pcs(best_point, params, cnfs)
@@ -870,8 +2896,15 @@ if __name__ == '__main__':
   print('  ' + str(skipped_impos_num) + ' impossible-combination points')
   print(str(len(generated_points)) + ' generated points, of them:')
   print('  ' + str(repeatedly_generated_points) + ' repeatedly generated points')
+  if op.opt_alg == '1+1':
+    print('Final expected number of changed parameters : ' + \
+      str(round(mutation_rate * escalation, 2)))
   print('Current points statuses:')
   print(stat(generated_points))
+  if op.opt_alg == 'SH':
+    print(sh)
+  if op.acceptance == 'robust':
+    print(noise)
   print('Final best max time : ' + str(max_instance_time_best_point))
   print('Final best sum time : ' + str(best_sum_time) + ' , so ' + \
     str(default_sum_time) + ' -> ' + str(best_sum_time))
@@ -884,3 +2917,5 @@ if __name__ == '__main__':
       print('Difference from the default point:')
       print(diff_str)
   print('Final best command : \n' + best_command)
+  print('')
+  print(profiler)
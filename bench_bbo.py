@@ -0,0 +1,311 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Benchmark of the tuner's throughput on the synthetic solver fake_solver.py.
+# For each combination of -cpunum and -optalg, bbo_param_solver.py is run in
+# a temporary folder for a given wall time, and its event log is analysed:
+#   points/s      - processed points per second,
+#   dispatch      - mean gap between finishing a point and starting the next
+#                   one in the same worker,
+#   idle          - share of idle core-seconds (from the tuner's profile),
+#   preempted     - share of core-seconds lost to UNFINISHED points,
+#   best/opt      - final best sum time relative to the landscape's optimum,
+#   t(5%)         - seconds until the best sum time is within 5% of the final one.
+# With -startupreps=, the startup time of each -optalg is measured first, as
+# the median wall time of tuner runs with -maxtime=0, which only import
+# modules, read the PCS and CNFs, and construct the optimizer.
+# The results are written to bench_output.txt.
+#
+# Example:
+#   python3 ./bench_bbo.py -cpunums=1,2,4 -optalgs=1+1,GP -maxtime=60
+#   python3 ./bench_bbo.py -optalgs=1+1,GP,RF -startupreps=10 -cpunums=
+#==============================================================================
+
+script_name = "bench_bbo.py"
+version = '0.0.2'
+
+import sys
+import os
+import time
+import json
+import shutil
+import tempfile
+import subprocess
+import statistics
+
+import fake_solver
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Input options:
+class Options:
+  cpu_nums = [1, 2]
+  opt_algs = ['1+1']
+  max_wall_time = 30
+  cnf_num = 4
+  param_num = 20
+  base = 0.1
+  noise = 0.0
+  mode = 'sleep'
+  seed = 0
+  pcs_file = ''
+  startup_reps = 0
+  def __init__(self):
+    self.cpu_nums = [1, 2]
+    self.opt_algs = ['1+1']
+    self.max_wall_time = 30
+    self.cnf_num = 4
+    self.param_num = 20
+    self.base = 0.1
+    self.noise = 0.0
+    self.mode = 'sleep'
+    self.seed = 0
+    self.pcs_file = ''
+    self.startup_reps = 0
+  def __str__(self):
+    s = 'cpu_nums      : ' + str(self.cpu_nums) + '\n' +\
+    'opt_algs      : ' + str(self.opt_algs) + '\n' +\
+    'max_wall_time : ' + str(self.max_wall_time) + '\n' +\
+    'cnf_num       : ' + str(self.cnf_num) + '\n' +\
+    'param_num     : ' + str(self.param_num) + '\n' +\
+    'base          : ' + str(self.base) + '\n' +\
+    'noise         : ' + str(self.noise) + '\n' +\
+    'mode          : ' + self.mode + '\n' +\
+    'seed          : ' + str(self.seed) + '\n' +\
+    'pcs_file      : ' + self.pcs_file + '\n' +\
+    'startup_reps  : ' + str(self.startup_reps)
+    return s
+  def read(self, argv) :
+    for p in argv:
+      if '-cpunums=' in p:
+        self.cpu_nums = [int(x) for x in p.split('-cpunums=')[1].split(',') if x != '']
+      if '-optalgs=' in p:
+        self.opt_algs = p.split('-optalgs=')[1].split(',')
+      if '-maxtime=' in p:
+        self.max_wall_time = int(p.split('-maxtime=')[1])
+      if '-cnfnum=' in p:
+        self.cnf_num = int(p.split('-cnfnum=')[1])
+      if '-paramnum=' in p:
+        self.param_num = int(p.split('-paramnum=')[1])
+      if '-base=' in p:
+        self.base = float(p.split('-base=')[1])
+      if '-noise=' in p:
+        self.noise = float(p.split('-noise=')[1])
+      if '-mode=' in p:
+        self.mode = p.split('-mode=')[1]
+      if '-seed=' in p:
+        self.seed = int(p.split('-seed=')[1])
+      if '-pcs=' in p:
+        self.pcs_file = os.path.abspath(p.split('-pcs=')[1])
+      if '-startupreps=' in p:
+        self.startup_reps = int(p.split('-startupreps=')[1])
+    assert(self.mode in ['sleep', 'spin'])
+    assert(self.max_wall_time > 0 and self.cnf_num > 0 and self.param_num > 1)
+
+def print_usage():
+  print('Usage : ' + script_name + ' [Options]')
+  print('  Options :\n' +\
+  '  -cpunums=<list>    - (default : 1,2)   comma-separated values of -cpunum' + '\n' +\
+  '  -optalgs=<list>    - (default : 1+1)   comma-separated values of -optalg' + '\n' +\
+  '  -maxtime=<int>     - (default : 30)    wall time of each tuner run' + '\n' +\
+  '  -cnfnum=<int>      - (default : 4)     number of synthetic CNFs' + '\n' +\
+  '  -paramnum=<int>    - (default : 20)    number of synthetic parameters' + '\n' +\
+  '  -base=<float>      - (default : 0.1)   runtime of the default point on a CNF' + '\n' +\
+  '  -noise=<float>     - (default : 0)     relative noise of runtimes' + '\n' +\
+  '  -mode=<str>        - (default : sleep) sleep or spin in the fake solver' + '\n' +\
+  '  -seed=<int>        - (default : 0)     seed of the landscape' + '\n' +\
+  '  -pcs=<str>         - (default : none)  PCS file instead of synthetic parameters' + '\n' +\
+  '  -startupreps=<int> - (default : 0)     runs per -optalg to measure the startup time' + '\n' +\
+  'An empty -cpunums= skips the throughput scenarios.')
+
+# Write a synthetic PCS file with parameters of various domain sizes:
+def write_synthetic_pcs(pcs_file_name : str, param_num : int):
+  with open(pcs_file_name, 'w') as f:
+    for i in range(param_num):
+      if i % 3 == 0:
+        f.write('bool' + str(i) + ' {false, true}[true]\n')
+      elif i % 3 == 1:
+        f.write('small' + str(i) + ' {0, 1, 2, 3, 4}[2]\n')
+      else:
+        f.write('log' + str(i) + ' {1, 10, 100, 1000, 10000, 100000}[100]\n')
+
+# Write trivial CNFs, the fake solver does not read them:
+def write_synthetic_cnfs(cnfs_folder_name : str, cnf_num : int):
+  os.makedirs(cnfs_folder_name)
+  for i in range(cnf_num):
+    with open(os.path.join(cnfs_folder_name, 'synth' + str(i) + '.cnf'), 'w') as f:
+      f.write('p cnf 2 1\n1 2 0\n')
+
+# Sum time of a point on all CNFs:
+def landscape_sum_time(factor : float, cnfs : list, op : Options):
+  return sum(op.base * factor * fake_solver.cnf_factor(cnf, op.seed) for cnf in cnfs)
+
+# Analyse the event log of a tuner run:
+def analyse_log(log_file_name : str, opt_sum_time : float):
+  evals = []
+  profile = dict()
+  bests = []
+  start_time = -1
+  with open(log_file_name, 'r') as f:
+    for line in f:
+      event = json.loads(line)
+      if event['event'] == 'start':
+        start_time = event['time']
+      elif event['event'] == 'eval':
+        evals.append(event)
+      elif event['event'] == 'best':
+        bests.append(event)
+      elif event['event'] == 'profile':
+        profile = event['profile']
+  res = dict()
+  elapsed = profile['elapsed'] if 'elapsed' in profile else -1
+  res['points'] = len(evals)
+  res['points/s'] = round(len(evals) / elapsed, 2) if elapsed > 0 else -1
+  # Gaps between consecutive points in the same worker:
+  gaps = []
+  worker_evals = dict()
+  for e in evals:
+    worker_evals.setdefault(e['worker'], []).append(e)
+  for w in worker_evals:
+    lst = sorted(worker_evals[w], key=lambda e: e['start'])
+    for i in range(1, len(lst)):
+      gaps.append(lst[i]['start'] - lst[i-1]['finish'])
+  res['dispatch'] = round(statistics.mean(gaps), 3) if len(gaps) > 0 else -1
+  if 'total_core_sec' in profile and profile['total_core_sec'] > 0:
+    res['idle'] = round(profile['idle_core_sec'] / profile['total_core_sec'], 3)
+    used_sec = profile['busy_core_sec'] + profile['preempted_core_sec']
+    res['preempted'] = round(profile['preempted_core_sec'] / used_sec, 3) if used_sec > 0 else 0.0
+  else:
+    res['idle'] = -1
+    res['preempted'] = -1
+  if len(bests) > 0:
+    final_best = bests[-1]['sum_time']
+    res['best/opt'] = round(final_best / opt_sum_time, 3)
+    res['t(5%)'] = -1
+    for b in bests:
+      if b['sum_time'] <= final_best * 1.05:
+        res['t(5%)'] = round(b['time'] - start_time, 2)
+        break
+  else:
+    res['best/opt'] = -1
+    res['t(5%)'] = -1
+  return res
+
+# Run the tuner on the fake solver in a temporary folder:
+def run_scenario(cpu_num : int, opt_alg : str, pcs_file_name : str, op : Options):
+  work_dir = tempfile.mkdtemp(prefix='bench_bbo_')
+  try:
+    shutil.copy(os.path.join(script_dir, 'fake_solver.py'), work_dir)
+    cnfs_folder_name = os.path.join(work_dir, 'cnfs')
+    write_synthetic_cnfs(cnfs_folder_name, op.cnf_num)
+    env = dict(os.environ)
+    env['FAKE_SOLVER_PCS'] = pcs_file_name
+    env['FAKE_SOLVER_SEED'] = str(op.seed)
+    env['FAKE_SOLVER_BASE'] = str(op.base)
+    env['FAKE_SOLVER_NOISE'] = str(op.noise)
+    env['FAKE_SOLVER_MODE'] = op.mode
+    log_file_name = os.path.join(work_dir, 'events.jsonl')
+    sys_lst = [sys.executable, os.path.join(script_dir, 'bbo_param_solver.py'), \
+      './fake_solver.py', pcs_file_name, cnfs_folder_name, \
+      '-optalg=' + opt_alg, '-cpunum=' + str(cpu_num), \
+      '-maxtime=' + str(op.max_wall_time), '-maxpoints=1000000', \
+      '-seed=' + str(op.seed), '-eventlog=' + log_file_name]
+    wall_start = time.time()
+    with open(os.path.join(work_dir, 'out'), 'w') as out:
+      subprocess.run(sys_lst, cwd=work_dir, env=env, stdout=out, \
+        stderr=subprocess.STDOUT)
+    wall_time = round(time.time() - wall_start, 2)
+    landscape = fake_solver.make_landscape(fake_solver.read_pcs_domains(pcs_file_name), op.seed)
+    cnfs = [os.path.join(cnfs_folder_name, x) for x in os.listdir(cnfs_folder_name)]
+    opt_sum_time = landscape_sum_time(fake_solver.optimum_factor(landscape), cnfs, op)
+    res = analyse_log(log_file_name, opt_sum_time)
+    res['wall'] = wall_time
+  finally:
+    shutil.rmtree(work_dir)
+  return res
+
+# Median, minimal and maximal wall times of tuner runs which stop right
+# after the startup:
+def startup_times(opt_alg : str, pcs_file_name : str, op : Options):
+  work_dir = tempfile.mkdtemp(prefix='bench_bbo_')
+  times = []
+  try:
+    shutil.copy(os.path.join(script_dir, 'fake_solver.py'), work_dir)
+    cnfs_folder_name = os.path.join(work_dir, 'cnfs')
+    write_synthetic_cnfs(cnfs_folder_name, op.cnf_num)
+    sys_lst = [sys.executable, os.path.join(script_dir, 'bbo_param_solver.py'), \
+      './fake_solver.py', pcs_file_name, cnfs_folder_name, \
+      '-optalg=' + opt_alg, '-maxtime=0', '-seed=' + str(op.seed), \
+      '-eventlog=' + os.path.join(work_dir, 'events.jsonl')]
+    for _ in range(op.startup_reps):
+      wall_start = time.time()
+      subprocess.run(sys_lst, cwd=work_dir, stdout=subprocess.DEVNULL, \
+        stderr=subprocess.DEVNULL)
+      times.append(time.time() - wall_start)
+  finally:
+    shutil.rmtree(work_dir)
+  return round(statistics.median(times), 3), round(min(times), 3), round(max(times), 3)
+
+if __name__ == '__main__':
+  if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  op = Options()
+  op.read(sys.argv[1:])
+  print(op)
+
+  tmp_pcs_dir = ''
+  pcs_file_name = op.pcs_file
+  if pcs_file_name == '':
+    tmp_pcs_dir = tempfile.mkdtemp(prefix='bench_bbo_pcs_')
+    pcs_file_name = os.path.join(tmp_pcs_dir, 'synthetic.pcs')
+    write_synthetic_pcs(pcs_file_name, op.param_num)
+
+  startup_lines = []
+  if op.startup_reps > 0:
+    startup_lines.append(' '.join('%-10s' % c for c in ['optalg', 'startup', 'min', 'max']))
+    # The interpreter's own startup for reference:
+    interp_times = []
+    for _ in range(op.startup_reps):
+      wall_start = time.time()
+      subprocess.run([sys.executable, '-c', 'pass'])
+      interp_times.append(time.time() - wall_start)
+    startup_lines.append(' '.join('%-10s' % str(x) for x in ['python', \
+      round(statistics.median(interp_times), 3), round(min(interp_times), 3), \
+      round(max(interp_times), 3)]))
+    print(startup_lines[-1])
+    for opt_alg in op.opt_algs:
+      print('Measuring startup time of optalg=' + opt_alg)
+      startup_lines.append(' '.join('%-10s' % str(x) for x in \
+        (opt_alg,) + startup_times(opt_alg, pcs_file_name, op)))
+      print(startup_lines[-1])
+
+  columns = ['cpunum', 'optalg', 'points', 'points/s', 'dispatch', 'idle', \
+    'preempted', 'best/opt', 't(5%)', 'wall']
+  lines = [' '.join('%-10s' % c for c in columns)]
+  for opt_alg in op.opt_algs:
+    for cpu_num in op.cpu_nums:
+      print('Running scenario cpunum=' + str(cpu_num) + ' optalg=' + opt_alg)
+      res = run_scenario(cpu_num, opt_alg, pcs_file_name, op)
+      res['cpunum'] = cpu_num
+      res['optalg'] = opt_alg
+      line = ' '.join('%-10s' % str(res[c]) for c in columns)
+      print(line)
+      lines.append(line)
+
+  if tmp_pcs_dir != '':
+    shutil.rmtree(tmp_pcs_dir)
+
+  out_name = 'bench_output.txt'
+  print('Writing results to file ' + out_name)
+  with open(out_name, 'w') as f:
+    f.write(str(op) + '\n\n')
+    if len(startup_lines) > 0:
+      for line in startup_lines:
+        f.write(line + '\n')
+      f.write('\n')
+    for line in lines:
+      f.write(line + '\n')
@@ -8,14 +8,25 @@
 #
 # Example:
 #   kissat --range > range && python3 ./convert_to_pcs.py range
+#   kissat --range > range && python3 ./convert_to_pcs.py range -budget=1e20
+#
+# Wide domains are discretized in a logarithmic scale. Without a budget,
+# hand-made grids from log_values_dict are used if given, otherwise grids
+# are generated. With a budget on the number of combinations, the number
+# of values of each parameter is chosen by its expected sensitivity, and
+# all grids are generated. Sensitivities can be given by a file with lines
+# 'name weight' (e.g. importances from param_importance.py), otherwise
+# a parameter with a wider domain is expected to be more sensitive.
 #==============================================================================
 
 script_name = "convert_to_pcs.py"
-version = '0.4.0'
+version = '0.5.0'
 MIN_DOMAIN_LEN_LOG_MODE = 11
 MAX_RIGHT_BOUND = 2147483647
+MAX_LOG_VALUES = 10
 
 import sys
+import math
 from decimal import Decimal
 
 # In kissat3, the following parameters don't affect the search:
@@ -243,12 +254,117 @@ def read_solver_parameters(param_file_name : str):
   assert(len(params) > 0)
   return params
 
+# Values of the form {1, 2, 5} * 10^k within given bounds, and the bounds:
+def nice_values(left : int, right : int):
+  values = {left, right}
+  k = 0
+  while pow(10, k) <= right:
+    for m in [1, 2, 5]:
+      x = m * pow(10, k)
+      if left < x < right:
+        values.add(x)
+    k += 1
+  return sorted(values)
+
+# Logarithmic scale that works with 0:
+def logscale(x : int):
+  return math.log(1 + x)
+
+# A grid of at most n values from left to right, which includes the default.
+# Values are spread uniformly in the logarithmic scale and snapped to
+# nice values (or to any integers in a small domain):
+def log_grid(left : int, default : int, right : int, n : int):
+  assert(left <= default <= right and n >= 2)
+  if right - left + 1 <= MIN_DOMAIN_LEN_LOG_MODE:
+    candidates = list(range(left, right + 1))
+  else:
+    candidates = nice_values(left, right)
+  if default not in candidates:
+    candidates = sorted(candidates + [default])
+  if len(candidates) <= n:
+    return candidates
+  lo = logscale(left)
+  hi = logscale(right)
+  grid = []
+  for i in range(n):
+    target = lo + (hi - lo) * i / (n - 1)
+    free = [x for x in candidates if x not in grid]
+    grid.append(min(free, key=lambda x: abs(logscale(x) - target)))
+  if default not in grid:
+    # Replace the inner value closest to the default (or a bound if
+    # there are no inner values):
+    inner = [x for x in grid if x not in [left, right]]
+    if len(inner) == 0:
+      inner = grid
+    grid.remove(min(inner, key=lambda x: abs(logscale(x) - logscale(default))))
+    grid.append(default)
+  return sorted(grid)
+
+# Number of grid values of a parameter if no budget is given:
+def default_grid_size(p : Param):
+  span = math.log10(max(p.right_bound, 1) / max(p.left_bound, 1))
+  return min(MAX_LOG_VALUES, max(4, round(span) + 2))
+
+# Read sensitivities of parameters from a file with lines 'name weight':
+def read_sensitivities(file_name : str):
+  sens = dict()
+  with open(file_name, 'r') as f:
+    for line in f.read().splitlines():
+      words = line.split()
+      if len(words) < 2:
+        continue
+      try:
+        sens[words[0]] = float(words[1])
+      except ValueError:
+        continue
+  return sens
+
+# Expected sensitivity of a parameter: given, or the width of its domain
+# in the logarithmic scale:
+def sensitivity(p : Param, sens : dict):
+  if p.name in sens:
+    return sens[p.name]
+  return 1 + math.log10(1 + logscale(p.right_bound) - logscale(p.left_bound))
+
+# Number of values of each non-Boolean parameter such that the number of
+# combinations is within the budget. Each parameter starts with its bounds
+# and default, then values are added greedily to the parameter with
+# the largest sensitivity per already given value:
+def allocate_grid_sizes(params : list, budget : float, sens : dict):
+  sizes = dict()
+  max_sizes = dict()
+  combin_num = 1
+  for p in params:
+    domain_len = p.right_bound - p.left_bound + 1
+    if p.left_bound == 0 and p.right_bound == 1:
+      sizes[p.name] = 2
+      max_sizes[p.name] = 2
+    else:
+      max_sizes[p.name] = min(domain_len, MAX_LOG_VALUES)
+      min_size = 2 if sensitivity(p, sens) <= 0 else 3
+      sizes[p.name] = min(domain_len, min_size)
+    combin_num *= sizes[p.name]
+  if combin_num > budget:
+    print('Warning: the budget ' + '%.2E' % Decimal(budget) + \
+      ' is less than the minimal number of combinations ' + '%.2E' % Decimal(combin_num))
+  while True:
+    candidates = [p for p in params if sizes[p.name] < max_sizes[p.name] and \
+      sensitivity(p, sens) > 0 and \
+      combin_num * (sizes[p.name] + 1) / sizes[p.name] <= budget]
+    if len(candidates) == 0:
+      break
+    p = max(candidates, key=lambda p: sensitivity(p, sens) / sizes[p.name])
+    combin_num = combin_num * (sizes[p.name] + 1) / sizes[p.name]
+    sizes[p.name] += 1
+  return sizes
+
 # Convert a given list of values to string:
-def domains_to_str(params : list):
+def domains_to_str(params : list, budget=-1, sens=dict()):
    res_str = ''
    dict_keys = []
    combin_num = 1
    values_len = 1
+   grid_sizes = allocate_grid_sizes(params, budget, sens) if budget > 0 else dict()
    for p in params:
       s = p.name + ' '
       values_len = p.right_bound - p.left_bound + 1
@@ -258,6 +374,10 @@ def domains_to_str(params : list):
          assert(p.default == 0 or p.default == 1)
          default_bool_str = 'true' if p.default == 1 else 'false'
          s += '{false, true}[' + default_bool_str + ']'
+      elif p.name in grid_sizes:
+        values = log_grid(p.left_bound, p.default, p.right_bound, grid_sizes[p.name])
+        values_len = len(values)
+        s += '{' + ', '.join(str(x) for x in values) + '}[' + str(p.default) + ']'
       elif values_len < MIN_DOMAIN_LEN_LOG_MODE:
         s += '{'
         for i in range(p.left_bound, p.right_bound + 1):
@@ -271,7 +391,10 @@ def domains_to_str(params : list):
         if key not in dict_keys:
           dict_keys.append(key)
         s += '{'
-        values = log_values_dict[key]
+        if key in log_values_dict:
+          values = log_values_dict[key]
+        else:
+          values = log_grid(p.left_bound, p.default, p.right_bound, default_grid_size(p))
         values_len = len(values)
         for i in range(values_len):
           s += str(values[i])
@@ -284,10 +407,15 @@ def domains_to_str(params : list):
    for key in dict_keys:
      print(key)
    print('combin_num : ' + '%.2E' % Decimal(combin_num))
+   if budget > 0:
+     print('budget     : ' + '%.2E' % Decimal(budget))
    return res_str
 
 def print_usage():
-  print('Usage : ' + script_name + ' solver-parameters')
+  print('Usage : ' + script_name + ' solver-parameters [Options]')
+  print('  Options :\n' +\
+  '  -budget=<float>       - (default : -1)   maximal number of combinations of values' + '\n' +\
+  '  -sensitivity=<str>    - (default : none) file with lines \'name weight\'')
 
 if __name__ == '__main__':
 
@@ -296,10 +424,18 @@ if __name__ == '__main__':
     exit(1)
 
   param_file_name = sys.argv[1]
+  budget = -1
+  sens = dict()
+  for arg in sys.argv[2:]:
+    if '-budget=' in arg:
+      budget = float(arg.split('-budget=')[1])
+    if '-sensitivity=' in arg:
+      sens = read_sensitivities(arg.split('-sensitivity=')[1])
+      print(str(len(sens)) + ' sensitivities were read')
   params = read_solver_parameters(param_file_name)
   print(str(len(params)) + ' parameters where read')
 
-  pcs_str = domains_to_str(params)
+  pcs_str = domains_to_str(params, budget, sens)
 
   # Report results:
   pcs_file_name = param_file_name + '.pcs'
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# A synthetic stand-in for a SAT solver to measure the tuner's throughput.
+# Kissat-style command lines are accepted:
+#   fake_solver.py --time=N --param1=value1 --param2=value2 ... cnf
+# where --conflicts=N or --decisions=N can be given instead of --time=N.
+# The runtime is given by a synthetic landscape over the PCS parameters,
+# the solver sleeps (or spins) for it, and prints kissat-style lines
+#   s SATISFIABLE
+#   c conflicts: <number>
+#   c decisions: <number>
+#   c process-time: <runtime> seconds
+# If the runtime exceeds the --time limit (or a counter exceeds its limit),
+# then 's UNKNOWN' is printed. Counters are proportional to the noise-free
+# runtime, so they are deterministic.
+#
+# The landscape is configured via environment variables:
+#   FAKE_SOLVER_PCS   - PCS file with the parameters (without it, the runtime
+#                       depends only on the CNF),
+#   FAKE_SOLVER_SEED  - (default : 0)     seed of the landscape,
+#   FAKE_SOLVER_BASE  - (default : 0.1)   runtime of the default point on an
+#                                         average CNF,
+#   FAKE_SOLVER_NOISE - (default : 0)     relative standard deviation of noise,
+#   FAKE_SOLVER_MODE  - (default : sleep) sleep or spin,
+#   FAKE_SOLVER_FAIL  - (default : 0)     share of (point, CNF) pairs on which
+#                                         the solver aborts halfway.
+#
+# Each parameter gets a random optimal value and a weight. Few parameters
+# are important, while the remaining ones barely affect the runtime.
+#==============================================================================
+
+script_name = "fake_solver.py"
+version = '0.0.2'
+
+import sys
+import os
+import time
+import random
+import hashlib
+
+IMPORTANT_PARAM_PROB = 0.2
+# Counters per second of the noise-free runtime:
+CONFLICTS_PER_SEC = 10000
+DECISIONS_PER_SEC = 50000
+
+# Deterministic pseudorandom generator for a given string:
+def str_random(s : str):
+  return random.Random(int(hashlib.md5(s.encode()).hexdigest(), 16))
+
+# Read names, values and defaults from a PCS file:
+def read_pcs_domains(pcs_file_name : str):
+  domains = []
+  with open(pcs_file_name, 'r') as f:
+    for line in f.read().splitlines():
+      if '{' not in line:
+        continue
+      name = line.split()[0]
+      values = line.split('{')[1].split('}')[0].replace(' ', '').split(',')
+      default = line.split('[')[1].split(']')[0]
+      domains.append((name, values, default))
+  return domains
+
+# Landscape: optimal value index and weight of each parameter:
+def make_landscape(domains : list, seed : int):
+  landscape = dict()
+  for name, values, default in domains:
+    rnd = str_random(str(seed) + '_' + name)
+    opt_indx = rnd.randrange(len(values))
+    if rnd.random() < IMPORTANT_PARAM_PROB:
+      weight = rnd.uniform(0.5, 2.0)
+    else:
+      weight = rnd.uniform(0.0, 0.05)
+    landscape[name] = (values, default, opt_indx, weight)
+  return landscape
+
+# Runtime factor of a point relative to the default one (1.0):
+def point_factor(landscape : dict, point : dict):
+  factor = 1.0
+  for name in landscape:
+    values, default, opt_indx, weight = landscape[name]
+    value = point[name] if name in point else default
+    if value not in values:
+      value = default
+    if len(values) == 1:
+      continue
+    dist = abs(values.index(value) - opt_indx) / (len(values) - 1)
+    def_dist = abs(values.index(default) - opt_indx) / (len(values) - 1)
+    factor *= (1 + weight * dist) / (1 + weight * def_dist)
+  return factor
+
+# Minimal factor, i.e. the one of the landscape's optimum:
+def optimum_factor(landscape : dict):
+  point = dict()
+  for name in landscape:
+    values, default, opt_indx, weight = landscape[name]
+    point[name] = values[opt_indx]
+  return point_factor(landscape, point)
+
+# Runtime factor of a CNF, from 0.5 to 2:
+def cnf_factor(cnf_file_name : str, seed : int):
+  rnd = str_random(str(seed) + '_' + os.path.basename(cnf_file_name))
+  return pow(2, rnd.uniform(-1, 1))
+
+if __name__ == '__main__':
+  if len(sys.argv) < 2 or sys.argv[1] in ['-h', '--help']:
+    print('Usage : ' + script_name + ' [--time=<int>] [--param=value ...] cnf')
+    exit(1)
+
+  time_lim = -1
+  conflicts_lim = -1
+  decisions_lim = -1
+  point = dict()
+  cnf_file_name = ''
+  for arg in sys.argv[1:]:
+    if arg.startswith('--time='):
+      time_lim = float(arg.split('--time=')[1])
+    elif arg.startswith('--conflicts='):
+      conflicts_lim = int(arg.split('--conflicts=')[1])
+    elif arg.startswith('--decisions='):
+      decisions_lim = int(arg.split('--decisions=')[1])
+    elif arg.startswith('--') and '=' in arg:
+      point[arg[2:].split('=')[0]] = arg.split('=')[1]
+    else:
+      cnf_file_name = arg
+  assert(cnf_file_name != '')
+
+  seed = int(os.environ.get('FAKE_SOLVER_SEED', '0'))
+  base = float(os.environ.get('FAKE_SOLVER_BASE', '0.1'))
+  noise = float(os.environ.get('FAKE_SOLVER_NOISE', '0'))
+  mode = os.environ.get('FAKE_SOLVER_MODE', 'sleep')
+  assert(mode in ['sleep', 'spin'])
+  fail_share = float(os.environ.get('FAKE_SOLVER_FAIL', '0'))
+
+  runtime = base * cnf_factor(cnf_file_name, seed)
+  if 'FAKE_SOLVER_PCS' in os.environ:
+    landscape = make_landscape(read_pcs_domains(os.environ['FAKE_SOLVER_PCS']), seed)
+    runtime *= point_factor(landscape, point)
+  conflicts = int(runtime * CONFLICTS_PER_SEC)
+  decisions = int(runtime * DECISIONS_PER_SEC)
+  if noise > 0:
+    runtime *= random.lognormvariate(0, noise)
+
+  is_solved = True
+  if time_lim > 0 and runtime > time_lim:
+    runtime = time_lim
+    is_solved = False
+  # The run is stopped at a counter's limit:
+  for counter, lim in [(conflicts, conflicts_lim), (decisions, decisions_lim)]:
+    if lim > 0 and counter > lim:
+      runtime *= lim / counter
+      is_solved = False
+  if not is_solved:
+    conflicts = min(int(runtime * CONFLICTS_PER_SEC), conflicts)
+    decisions = min(int(runtime * DECISIONS_PER_SEC), decisions)
+
+  # Crashes are deterministic, as bugs triggered by parameters are:
+  point_str = ' '.join(sorted(k + '=' + v for k, v in point.items()))
+  if fail_share > 0 and str_random(point_str + '_' + cnf_file_name).random() < fail_share:
+    time.sleep(runtime / 2)
+    print('c ---- [ result ] ' + '-' * 60)
+    sys.stdout.flush()
+    os.abort()
+
+  if mode == 'sleep':
+    time.sleep(runtime)
+  else:
+    start_time = time.process_time()
+    while time.process_time() - start_time < runtime:
+      pass
+
+  print('c ---- [ result ] ' + '-' * 60)
+  print('s SATISFIABLE' if is_solved else 's UNKNOWN')
+  print('c ---- [ statistics ] ' + '-' * 56)
+  print('c conflicts: ' + ' ' * 25 + str(conflicts))
+  print('c decisions: ' + ' ' * 25 + str(decisions))
+  print('c ---- [ run-time profiling ] ' + '-' * 48)
+  print('c process-time: ' + ' ' * 20 + '%.2f' % max(runtime, 0.01) + ' seconds')
+  sys.stdout.flush()
+  exit(10 if is_solved else 0)
@@ -0,0 +1,179 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Columnar history of evaluations of bbo_param_solver.py.
+# A history is a folder with meta.json and one .npy file per column:
+#   points.npy      - int16   [evals x params] indices of parameters' values,
+#   status.npy      - int8    [evals] index in meta['statuses'],
+#   sum_time.npy    - float64 [evals] sum time (-1 if interrupted),
+#   start.npy       - float64 [evals] wall time when the calculation started,
+#   finish.npy      - float64 [evals] wall time when it finished,
+#   cap.npy         - float32 [evals] solver's time limit,
+#   run.npy         - int16   [evals] index in meta['runs'],
+#   inst_time.npy   - float32 [evals x cnfs] runtimes (NaN if not run),
+#   inst_status.npy - int8    [evals x cnfs] index in meta['inst_statuses'],
+#                               where 0 means that the CNF was not run.
+# Columns are memory-mapped by the reader, so even millions of evaluations
+# are loaded without reading or copying the files.
+# A history is made from a JSONL event log either by the tuner itself (with
+# -columnar=) or by this script.
+#
+# Example:
+#   python3 ./history.py ./generated_points.jsonl ./history/
+#==============================================================================
+
+script_name = "history.py"
+version = '0.0.1'
+
+import sys
+import os
+import json
+
+import numpy as np
+
+META_FILE_NAME = 'meta.json'
+
+# Column name, type, and whether it has a value per CNF:
+columns = [
+  ('points', np.int16, False),
+  ('status', np.int8, False),
+  ('sum_time', np.float64, False),
+  ('start', np.float64, False),
+  ('finish', np.float64, False),
+  ('cap', np.float32, False),
+  ('run', np.int16, False),
+  ('inst_time', np.float32, True),
+  ('inst_status', np.int8, True)
+]
+
+def print_usage():
+  print('Usage : ' + script_name + ' event-log history-folder [Options]')
+  print('  Options :\n' +\
+  '  -run=<str>  - (default : all)  convert only evaluations of a given tuner run')
+
+# Index of a value in a list, the value is appended if it is new:
+def code_of(value, lst : list):
+  if value not in lst:
+    lst.append(value)
+  return lst.index(value)
+
+# Convert a JSONL event log to a columnar history. The parameters' space is
+# taken from the first 'start' event, evaluations of points outside it are
+# skipped. Returns the number of converted evaluations:
+def convert_event_log(log_file_name : str, history_dir : str, run_id=''):
+  meta = {'params' : [], 'values' : [], 'default' : [], 'cnfs' : [], \
+    'runs' : [], 'statuses' : [], 'inst_statuses' : ['']}
+  cnf_indices = dict()
+  data = {name : [] for name, _, _ in columns}
+  with open(log_file_name, 'r') as f:
+    for line in f:
+      try:
+        event = json.loads(line)
+      except json.JSONDecodeError:
+        continue
+      if run_id != '' and event['run'] != run_id:
+        continue
+      if event['event'] == 'start':
+        if len(meta['params']) == 0:
+          meta['params'] = event['params']
+          meta['values'] = event['values']
+          meta['default'] = event['default']
+        for cnf in event['cnfs']:
+          code_of(cnf, meta['cnfs'])
+        continue
+      if event['event'] != 'eval' or len(meta['params']) == 0:
+        continue
+      point = event['point']
+      if len(point) != len(meta['params']) or \
+        any(point[j] not in meta['values'][j] for j in range(len(point))):
+        continue
+      data['points'].append([meta['values'][j].index(point[j]) for j in range(len(point))])
+      data['status'].append(code_of(event['status'], meta['statuses']))
+      data['sum_time'].append(event['sum_time'])
+      data['start'].append(event['start'])
+      data['finish'].append(event['finish'])
+      data['cap'].append(event['cap'])
+      data['run'].append(code_of(event['run'], meta['runs']))
+      # Per-CNF results are sparse until the number of CNFs is known:
+      data['inst_time'].append([(code_of(inst['cnf'], meta['cnfs']), inst['time']) \
+        for inst in event['instances']])
+      data['inst_status'].append([(code_of(inst['cnf'], meta['cnfs']), \
+        code_of(inst['status'], meta['inst_statuses'])) for inst in event['instances']])
+  evals_num = len(data['status'])
+  cnfs_num = len(meta['cnfs'])
+  os.makedirs(history_dir, exist_ok=True)
+  for name, dtype, is_per_cnf in columns:
+    if is_per_cnf:
+      arr = np.full((evals_num, cnfs_num), np.nan if name == 'inst_time' else 0, dtype=dtype)
+      for i, row in enumerate(data[name]):
+        for k, x in row:
+          arr[i, k] = x
+    elif name == 'points':
+      arr = np.array(data[name], dtype=dtype).reshape((evals_num, len(meta['params'])))
+    else:
+      arr = np.array(data[name], dtype=dtype)
+    np.save(os.path.join(history_dir, name + '.npy'), arr)
+  meta['evals'] = evals_num
+  meta['version'] = version
+  with open(os.path.join(history_dir, META_FILE_NAME), 'w') as f:
+    json.dump(meta, f)
+  return evals_num
+
+# Memory-mapped columnar history:
+class History:
+  def __init__(self, history_dir : str):
+    with open(os.path.join(history_dir, META_FILE_NAME), 'r') as f:
+      meta = json.load(f)
+    self.params = meta['params']
+    self.values = meta['values']
+    self.default = meta['default']
+    self.cnfs = meta['cnfs']
+    self.runs = meta['runs']
+    self.statuses = meta['statuses']
+    self.inst_statuses = meta['inst_statuses']
+    for name, _, _ in columns:
+      setattr(self, name, np.load(os.path.join(history_dir, name + '.npy'), \
+        mmap_mode='r'))
+  def __len__(self):
+    return len(self.status)
+  def __str__(self):
+    return str(len(self)) + ' evaluations of ' + str(len(self.params)) + \
+      ' parameters on ' + str(len(self.cnfs)) + ' CNFs from ' + \
+      str(len(self.runs)) + ' runs'
+  # Values of parameters of an evaluated point:
+  def point(self, i : int):
+    return [self.values[j][self.points[i, j]] for j in range(len(self.params))]
+  # Mask of evaluations with a given status, e.g. 'FINISHED':
+  def status_mask(self, status : str):
+    if status not in self.statuses:
+      return np.zeros(len(self), dtype=bool)
+    return self.status == self.statuses.index(status)
+  # Mask of per-CNF results with a given status, e.g. 'SAT':
+  def inst_status_mask(self, status : str):
+    if status not in self.inst_statuses:
+      return np.zeros(self.inst_status.shape, dtype=bool)
+    return self.inst_status == self.inst_statuses.index(status)
+  # Convergence curve: finish times and the best sum times so far of finished
+  # evaluations on all CNFs:
+  def convergence(self):
+    mask = self.status_mask('FINISHED') & (self.inst_status != 0).all(axis=1)
+    order = np.argsort(self.finish[mask])
+    return self.finish[mask][order], np.minimum.accumulate(self.sum_time[mask][order])
+
+if __name__ == '__main__':
+  if len(sys.argv) < 3 or sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  log_file_name = sys.argv[1]
+  history_dir = sys.argv[2]
+  run_id = ''
+  for p in sys.argv[3:]:
+    if '-run=' in p:
+      run_id = p.split('-run=')[1]
+
+  evals_num = convert_event_log(log_file_name, history_dir, run_id)
+  print(str(evals_num) + ' evaluations are written to folder ' + history_dir)
+  print(History(history_dir))
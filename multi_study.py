@@ -0,0 +1,215 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Run several tuning studies by bbo_param_solver.py at once on a shared
+# budget of CPU cores. Each study has its own solver, PCS, CNFs and tuner
+# options (e.g. -optalg=), and is run in its own folder.
+# Instead of a static split of cores, each tuner leases a core from the
+# scheduler before it starts a calculation of a point and returns it after
+# the calculation (see -scheduler= of bbo_param_solver.py). A free core is
+# granted to the waiting study with the smallest number of held cores
+# relative to its weight, so cores of a stalled or finished study go to
+# the others, while busy studies share cores in proportion to weights.
+# The scheduler listens on a Unix socket, tuners are authenticated by a
+# random key given to them via an environment variable.
+#
+# A studies file has one study per line:
+#   name weight solver solver-parameters cnfs-folder [tuner options]
+# Lines starting with '#' are comments. Unless a study's options set
+# -cpunum=, the study may use all cores of the budget.
+#
+# Example:
+#   python3 ./multi_study.py ./studies.txt -cpunum=32
+# with studies.txt:
+#   kissat3 1 ./kissat_3.0.0 ./kissat3.pcs ./cnfs/ -maxtime=86400
+#   kissat4 2 ./kissat_4.0.0 ./kissat4.pcs ./cnfs/ -maxtime=86400 -optalg=RF
+#==============================================================================
+
+script_name = "multi_study.py"
+version = '0.0.1'
+
+import sys
+import os
+import time
+import threading
+import subprocess
+from multiprocessing.connection import Listener
+
+from bbo_param_solver import SCHEDULER_KEY_ENV, SCHEDULER_STUDY_ENV
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Input options:
+class Options:
+  cpu_num = 1
+  socket_file = 'multi_study.sock'
+  def __init__(self):
+    self.cpu_num = 1
+    self.socket_file = 'multi_study.sock'
+  def __str__(self):
+    s = 'cpu_num     : ' + str(self.cpu_num) + '\n' +\
+    'socket_file : ' + self.socket_file
+    return s
+  def read(self, argv) :
+    for p in argv:
+      if '-cpunum=' in p:
+        self.cpu_num = int(p.split('-cpunum=')[1])
+      if '-socket=' in p:
+        self.socket_file = p.split('-socket=')[1]
+    assert(self.cpu_num > 0)
+
+def print_usage():
+  print('Usage : ' + script_name + ' studies-file [Options]')
+  print('  Options :\n' +\
+  '  -cpunum=<int>  - (default : 1)  budget of CPU cores shared by all studies' + '\n' +\
+  '  -socket=<str>  - (default : multi_study.sock) Unix socket of the scheduler')
+
+# Tuning study:
+class Study:
+  name : str
+  weight : float
+  args : list
+  def __init__(self):
+    self.name = ''
+    self.weight = 1.0
+    self.args = []
+
+# Read studies, paths of solvers, PCSs and CNFs are made absolute since
+# each study is run in its own folder:
+def read_studies(studies_file_name : str):
+  studies = []
+  with open(studies_file_name, 'r') as f:
+    for line in f.read().splitlines():
+      words = line.split()
+      if len(words) == 0 or words[0].startswith('#'):
+        continue
+      assert(len(words) >= 5)
+      st = Study()
+      st.name = words[0]
+      st.weight = float(words[1])
+      assert(st.weight > 0)
+      st.args = [os.path.abspath(w) for w in words[2:5]] + words[5:]
+      studies.append(st)
+  assert(len(set(st.name for st in studies)) == len(studies))
+  return studies
+
+# Fair-share scheduler of leases of cores:
+class Scheduler:
+  def __init__(self, cpu_num : int, weights : dict):
+    self.free_num = cpu_num
+    self.weights = weights
+    self.lock = threading.Lock()
+    # Study -> number of held leases:
+    self.held = dict()
+    # Study -> number of granted leases since the start:
+    self.granted = dict()
+    # Pending requests as (study, connection) in the order of arrival:
+    self.waiting = []
+  # Serve a tuner's connection until it is closed:
+  def serve(self, conn):
+    name = ''
+    try:
+      while True:
+        msg, arg = conn.recv()
+        with self.lock:
+          if msg == 'hello':
+            name = arg
+            self.held.setdefault(name, 0)
+            self.granted.setdefault(name, 0)
+          elif msg == 'acquire':
+            self.waiting += [(name, conn)] * arg
+          elif msg == 'release':
+            assert(arg <= self.held[name])
+            self.held[name] -= arg
+            self.free_num += arg
+          self.dispatch()
+    except (EOFError, OSError):
+      pass
+    # Leases of a finished tuner return to the budget:
+    with self.lock:
+      if name in self.held:
+        self.free_num += self.held[name]
+        self.held[name] = 0
+      self.waiting = [w for w in self.waiting if w[1] is not conn]
+      self.dispatch()
+    conn.close()
+  # Grant free cores to waiting studies with the smallest weighted shares:
+  def dispatch(self):
+    while self.free_num > 0 and len(self.waiting) > 0:
+      i = min(range(len(self.waiting)), key=lambda i: \
+        (self.held[self.waiting[i][0]] / self.weights.get(self.waiting[i][0], 1.0), i))
+      name, conn = self.waiting.pop(i)
+      try:
+        conn.send('grant')
+      except OSError:
+        continue
+      self.held[name] += 1
+      self.granted[name] += 1
+      self.free_num -= 1
+
+# Accept connections of tuners, each one is served by its own thread:
+def accept_loop(listener, scheduler : Scheduler):
+  while True:
+    try:
+      conn = listener.accept()
+    except OSError:
+      break
+    threading.Thread(target=scheduler.serve, args=(conn,), daemon=True).start()
+
+if __name__ == '__main__':
+  if len(sys.argv) < 2 or sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  studies_file_name = sys.argv[1]
+  op = Options()
+  op.read(sys.argv[2:])
+  print(op)
+
+  studies = read_studies(studies_file_name)
+  assert(len(studies) > 0)
+  print(str(len(studies)) + ' studies were read')
+
+  socket_file = os.path.abspath(op.socket_file)
+  if os.path.exists(socket_file):
+    os.remove(socket_file)
+  key = os.urandom(32)
+  listener = Listener(socket_file, family='AF_UNIX', authkey=key)
+  scheduler = Scheduler(op.cpu_num, {st.name : st.weight for st in studies})
+  threading.Thread(target=accept_loop, args=(listener, scheduler), daemon=True).start()
+  print('Scheduler of ' + str(op.cpu_num) + ' cores listens on ' + socket_file)
+
+  start_time = time.time()
+  procs = []
+  for st in studies:
+    os.makedirs(st.name, exist_ok=True)
+    sys_lst = [sys.executable, os.path.join(script_dir, 'bbo_param_solver.py')] + \
+      st.args + ['-scheduler=' + socket_file]
+    if not any('-cpunum=' in a for a in st.args):
+      sys_lst.append('-cpunum=' + str(op.cpu_num))
+    env = dict(os.environ)
+    env[SCHEDULER_KEY_ENV] = key.hex()
+    env[SCHEDULER_STUDY_ENV] = st.name
+    out_file_name = os.path.join(st.name, 'out')
+    print('Starting study ' + st.name + ' with weight ' + str(st.weight) + \
+      ', its output is in file ' + out_file_name)
+    with open(out_file_name, 'w') as out:
+      procs.append(subprocess.Popen(sys_lst, cwd=st.name, env=env, stdout=out, \
+        stderr=subprocess.STDOUT))
+
+  exit_codes = []
+  for st, proc in zip(studies, procs):
+    exit_codes.append(proc.wait())
+    print('Study ' + st.name + ' is finished with exit code ' + str(exit_codes[-1]) + \
+      ' after ' + str(round(time.time() - start_time, 2)) + ' seconds')
+  # The socket file is removed by the listener:
+  listener.close()
+
+  print('')
+  print('%-20s %-8s %-10s %s' % ('study', 'weight', 'exit code', 'leased cores'))
+  for st, code in zip(studies, exit_codes):
+    print('%-20s %-8s %-10s %s' % (st.name, str(st.weight), str(code), \
+      str(scheduler.granted.get(st.name, 0))))
+  print('Final best points are in files <study>/final_best.pcs')
@@ -1,7 +1,7 @@
 #!/usr/bin/bash
 
 scriptname="parallel_bbo.sh"
-version="0.0.1"
+version="0.0.2"
 
 if [ $# -ne 1 ]; then
   echo "Usage: $scriptname cpunum"
@@ -18,5 +18,5 @@ echo "cpu_num   : $cpunum"
 set -x
 for (( i=1; i<=$cpunum; i++ ))
 do
-    python3 ./bbo_param_solver.py kissat_3.0.0 ./kissat3.pcs ./cbmc_md5-28_1hash.cnf $i &> out_28_$i &
+    python3 ./bbo_param_solver.py kissat_3.0.0 ./kissat3.pcs ./cbmc_md5-28_1hash.cnf $i -affinity=core &> out_28_$i &
 done
@@ -0,0 +1,239 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Given a PCS file and an event log (or a columnar history, see history.py)
+# of bbo_param_solver.py, estimate which
+# parameters matter and write a reduced PCS for the next tuning run.
+# Each evaluation is scored by the mean log-ratio of its runtimes to the
+# median runtime on the same CNF, so points processed on different subsets
+# of CNFs (successive halving, early breaks) are comparable. Interrupted
+# and failed runs are counted as twice their runtime (PAR2).
+# A random forest is fit on the value indices of the parameters, and the
+# importance of a parameter is the variance of its partial dependence, i.e.
+# its first-order (main) effect in a fANOVA-style decomposition, relative
+# to the variance of the forest's predictions.
+# The most important parameters, which cover -keep of the summed main
+# effects, keep their domains in reduced.pcs. The remaining ones are frozen
+# at their defaults via single-value domains.
+# Importances are written to importance.txt as 'name weight' lines, which
+# can be given to convert_to_pcs.py via -sensitivity=.
+#
+# Example:
+#   python3 ./param_importance.py ./kissat.pcs ./generated_points.jsonl -keep=0.9
+#==============================================================================
+
+script_name = "param_importance.py"
+version = '0.0.3'
+
+import sys
+import os
+import math
+import random
+import statistics
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from bbo_param_solver import read_pcs, read_history
+from history import History
+
+# Penalty factor of interrupted and failed runs:
+PAR_FACTOR = 2
+# Statuses of runs with a valid runtime:
+SOLVED_STATUSES = ['SAT', 'UNSAT']
+# Rows of the history used to estimate partial dependences:
+MAX_PD_ROWS = 1000
+
+# Input options:
+class Options:
+  keep = 0.9
+  min_params = 2
+  trees = 100
+  seed = 0
+  run_id = ''
+  out_pcs = 'reduced.pcs'
+  def __init__(self):
+    self.keep = 0.9
+    self.min_params = 2
+    self.trees = 100
+    self.seed = 0
+    self.run_id = ''
+    self.out_pcs = 'reduced.pcs'
+  def __str__(self):
+    s = 'keep       : ' + str(self.keep) + '\n' +\
+    'min_params : ' + str(self.min_params) + '\n' +\
+    'trees      : ' + str(self.trees) + '\n' +\
+    'seed       : ' + str(self.seed) + '\n' +\
+    'run_id     : ' + self.run_id + '\n' +\
+    'out_pcs    : ' + self.out_pcs
+    return s
+  def read(self, argv) :
+    for p in argv:
+      if '-keep=' in p:
+        self.keep = float(p.split('-keep=')[1])
+      if '-minparams=' in p:
+        self.min_params = int(p.split('-minparams=')[1])
+      if '-trees=' in p:
+        self.trees = int(p.split('-trees=')[1])
+      if '-seed=' in p:
+        self.seed = int(p.split('-seed=')[1])
+      if '-run=' in p:
+        self.run_id = p.split('-run=')[1]
+      if '-out=' in p:
+        self.out_pcs = p.split('-out=')[1]
+    assert(self.keep > 0 and self.keep <= 1)
+    assert(self.min_params > 0 and self.trees > 0)
+
+def print_usage():
+  print('Usage : ' + script_name + ' solver-parameters event-log|history-folder [Options]')
+  print('  Options :\n' +\
+  '  -keep=<float>     - (default : 0.9)  share of summed main effects covered by kept parameters' + '\n' +\
+  '  -minparams=<int>  - (default : 2)    minimal number of kept parameters' + '\n' +\
+  '  -trees=<int>      - (default : 100)  number of trees in the random forest' + '\n' +\
+  '  -seed=<int>       - (default : 0)    seed for the random forest' + '\n' +\
+  '  -run=<str>        - (default : all)  use only evaluations of a given tuner run' + '\n' +\
+  '  -out=<str>        - (default : reduced.pcs) name of the reduced PCS file')
+
+# Scores of evaluations whose points belong to the PCS space.
+# Returns rows of value indices and scores:
+def score_history(history : list, params : list):
+  cnf_times = dict()
+  for e in history:
+    for inst in e['instances']:
+      if inst['status'] in SOLVED_STATUSES:
+        cnf_times.setdefault(inst['cnf'], []).append(inst['time'])
+  ref_times = {cnf : statistics.median(cnf_times[cnf]) for cnf in cnf_times}
+  rows = []
+  scores = []
+  for e in history:
+    point = e['point']
+    if len(point) != len(params) or \
+      any(point[i] not in params[i].values for i in range(len(params))):
+      continue
+    log_ratios = []
+    for inst in e['instances']:
+      if inst['cnf'] not in ref_times:
+        continue
+      t = inst['time'] if inst['status'] in SOLVED_STATUSES else inst['time'] * PAR_FACTOR
+      log_ratios.append(math.log(max(t, 0.01) / max(ref_times[inst['cnf']], 0.01)))
+    if len(log_ratios) == 0:
+      continue
+    rows.append([params[i].values.index(point[i]) for i in range(len(params))])
+    scores.append(sum(log_ratios) / len(log_ratios))
+  return rows, scores
+
+# The same scores for a columnar history, computed on memory-mapped columns:
+def score_columnar(hist : History, params : list):
+  # Indices of the PCS's values for indices of the history's values:
+  in_space = np.ones(len(hist), dtype=bool)
+  rows = np.zeros((len(hist), len(params)), dtype=int)
+  for j in range(len(params)):
+    assert(params[j].name in hist.params)
+    k = hist.params.index(params[j].name)
+    remap = np.array([params[j].values.index(v) if v in params[j].values else -1 \
+      for v in hist.values[k]])
+    rows[:, j] = remap[hist.points[:, k]]
+    in_space &= rows[:, j] >= 0
+  is_run = hist.inst_status != 0
+  is_sat = hist.inst_status_mask('SAT') | hist.inst_status_mask('UNSAT')
+  with np.errstate(all='ignore'):
+    ref_times = np.nanmedian(np.where(is_sat, hist.inst_time, np.nan), axis=0)
+    times = np.where(is_sat, hist.inst_time, hist.inst_time * PAR_FACTOR)
+    log_ratios = np.log(np.maximum(times, 0.01) / np.maximum(ref_times, 0.01))
+    log_ratios = np.where(is_run & ~np.isnan(ref_times), log_ratios, np.nan)
+    scores = np.nanmean(log_ratios, axis=1)
+  mask = in_space & ~np.isnan(scores)
+  return rows[mask].tolist(), scores[mask].tolist()
+
+# Main effects of parameters, i.e. variances of partial dependences relative
+# to the variance of the predictions:
+def main_effects(forest, rows : list, params : list, seed : int):
+  rnd = random.Random(seed)
+  pd_rows = rows if len(rows) <= MAX_PD_ROWS else rnd.sample(rows, MAX_PD_ROWS)
+  X = np.array(pd_rows, dtype=float)
+  total_var = float(np.var(forest.predict(X)))
+  effects = []
+  for j in range(len(params)):
+    pd = []
+    for v in range(len(params[j].values)):
+      Xv = X.copy()
+      Xv[:, j] = v
+      pd.append(float(np.mean(forest.predict(Xv))))
+    effects.append(statistics.pvariance(pd) / total_var if total_var > 0 else 0.0)
+  return effects
+
+# Indices of parameters to keep, the most important ones first:
+def kept_params(effects : list, keep : float, min_params : int):
+  order = sorted(range(len(effects)), key=lambda j: effects[j], reverse=True)
+  total = sum(effects)
+  kept = []
+  covered = 0.0
+  for j in order:
+    if len(kept) >= min_params and covered >= keep * total:
+      break
+    kept.append(j)
+    covered += effects[j]
+  return kept
+
+# Write a PCS where parameters which are not kept have only their defaults:
+def write_reduced_pcs(pcs_file_name : str, params : list, kept : list):
+  with open(pcs_file_name, 'w') as f:
+    for j in range(len(params)):
+      values = params[j].values if j in kept else [params[j].default]
+      f.write(params[j].name + ' {' + ', '.join(str(v) for v in values) + '}' + \
+        '[' + str(params[j].default) + ']\n')
+
+if __name__ == '__main__':
+  if len(sys.argv) < 3 or sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  param_file_name = sys.argv[1]
+  history_file_name = sys.argv[2]
+  op = Options()
+  op.read(sys.argv[3:])
+  print(op)
+
+  params = read_pcs(param_file_name)
+  print(str(len(params)) + ' parameters were read')
+  if os.path.isdir(history_file_name):
+    hist = History(history_file_name)
+    print(hist)
+    assert(op.run_id == '')
+    rows, scores = score_columnar(hist, params)
+  else:
+    history = read_history(history_file_name, op.run_id)
+    print(str(len(history)) + ' evaluations were read')
+    rows, scores = score_history(history, params)
+  print(str(len(rows)) + ' evaluations are in the PCS space')
+  if len(rows) < 2:
+    print('Not enough evaluations to estimate importance')
+    exit(1)
+
+  forest = RandomForestRegressor(n_estimators=op.trees, min_samples_leaf=3, \
+    random_state=op.seed, n_jobs=-1)
+  forest.fit(rows, scores)
+  effects = main_effects(forest, rows, params, op.seed)
+  kept = kept_params(effects, op.keep, op.min_params)
+
+  order = sorted(range(len(params)), key=lambda j: effects[j], reverse=True)
+  print('')
+  print('%-30s %-12s %-12s %s' % ('parameter', 'main effect', 'forest imp.', 'kept'))
+  for j in order:
+    print('%-30s %-12s %-12s %s' % (params[j].name, str(round(effects[j], 4)), \
+      str(round(forest.feature_importances_[j], 4)), 'yes' if j in kept else 'no'))
+  print('Main effects sum to ' + str(round(sum(effects), 4)) + \
+    ' of the variance, the rest is due to interactions')
+
+  importance_file_name = 'importance.txt'
+  print('Writing importances to file ' + importance_file_name)
+  with open(importance_file_name, 'w') as f:
+    for j in order:
+      f.write(params[j].name + ' ' + str(round(effects[j], 6)) + '\n')
+
+  print(str(len(kept)) + ' out of ' + str(len(params)) + \
+    ' parameters are kept, the rest are frozen at their defaults')
+  print('Writing reduced PCS to file ' + op.out_pcs)
+  write_reduced_pcs(op.out_pcs, params, kept)
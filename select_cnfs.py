@@ -0,0 +1,214 @@
+# Created on: 19 Oct 2026
+# Author: Oleg Zaikin
+# E-mail: zaikin.icc@gmail.com
+#
+# Given a folder with CNFs, choose a small representative subset of them
+# for tuning by bbo_param_solver.py.
+# Cheap structural features are extracted from each CNF by a streaming
+# DIMACS reader (memory-mapped for uncompressed CNFs), the CNFs are
+# clustered by k-means on standardized features, and in each cluster
+# the CNF closest to the centroid is chosen.
+# Symbolic links to the chosen CNFs are made in the output folder, while
+# the features are written to cnf_features.csv.
+#
+# Example:
+#   python3 ./select_cnfs.py ./cnfs/ -k=5 -cpunum=4 -out=./cnfs_subset/
+#==============================================================================
+
+script_name = "select_cnfs.py"
+version = '0.0.1'
+
+import sys
+import os
+import math
+import mmap
+import random
+import multiprocessing as mp
+
+from bbo_param_solver import read_cnfs, cnf_openers
+
+# Clause lengths are counted in bins [1], [2], [3], [4], [5, 8], [9, inf):
+CLAUSE_LEN_BINS = [1, 2, 3, 4, 5, 9]
+KMEANS_MAX_ITER = 100
+
+feature_names = ['vars', 'clauses', 'clauses_per_var', 'mean_clause_len'] + \
+  ['len_' + str(b) for b in CLAUSE_LEN_BINS] + ['pos_lit_ratio', 'horn_ratio']
+
+# Input options:
+class Options:
+  k = 5
+  cpu_num = 1
+  seed = 0
+  out_dir = 'cnfs_subset'
+  def __init__(self):
+    self.k = 5
+    self.cpu_num = 1
+    self.seed = 0
+    self.out_dir = 'cnfs_subset'
+  def __str__(self):
+    s = 'k       : ' + str(self.k) + '\n' +\
+    'cpu_num : ' + str(self.cpu_num) + '\n' +\
+    'seed    : ' + str(self.seed) + '\n' +\
+    'out_dir : ' + self.out_dir
+    return s
+  def read(self, argv) :
+    for p in argv:
+      if '-k=' in p:
+        self.k = int(p.split('-k=')[1])
+      if '-cpunum=' in p:
+        self.cpu_num = int(p.split('-cpunum=')[1])
+      if '-seed=' in p:
+        self.seed = int(p.split('-seed=')[1])
+      if '-out=' in p:
+        self.out_dir = p.split('-out=')[1]
+    assert(self.k > 0 and self.cpu_num > 0)
+
+def print_usage():
+  print('Usage : ' + script_name + ' cnfs-folder [Options]')
+  print('  Options :\n' +\
+  '  -k=<int>       - (default : 5)           number of chosen CNFs' + '\n' +\
+  '  -cpunum=<int>  - (default : 1)           number of used CPU cores' + '\n' +\
+  '  -seed=<int>    - (default : 0)           seed for k-means' + '\n' +\
+  '  -out=<str>     - (default : cnfs_subset) folder for links to chosen CNFs')
+
+# Lines of a CNF, memory-mapped if uncompressed:
+def cnf_lines(cnf_file_name : str):
+  ext = os.path.splitext(cnf_file_name)[1]
+  if ext in cnf_openers:
+    with cnf_openers[ext](cnf_file_name, 'rb') as f:
+      for line in f:
+        yield line
+  else:
+    with open(cnf_file_name, 'rb') as f:
+      if os.fstat(f.fileno()).st_size == 0:
+        return
+      with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b''):
+          yield line
+
+# Structural features of a CNF in the order of feature_names:
+def cnf_features(cnf_file_name : str):
+  var_num = 0
+  clause_num = 0
+  lit_num = 0
+  pos_lit_num = 0
+  horn_num = 0
+  len_hist = [0 for _ in CLAUSE_LEN_BINS]
+  clause_len = 0
+  clause_pos = 0
+  for line in cnf_lines(cnf_file_name):
+    if line[:1] in [b'c', b'%']:
+      continue
+    if line[:1] == b'p':
+      words = line.split()
+      assert(len(words) == 4 and words[1] == b'cnf')
+      var_num = int(words[2])
+      continue
+    # A clause might be split between lines:
+    for word in line.split():
+      lit = int(word)
+      if lit == 0:
+        clause_num += 1
+        for i in reversed(range(len(CLAUSE_LEN_BINS))):
+          if clause_len >= CLAUSE_LEN_BINS[i]:
+            len_hist[i] += 1
+            break
+        if clause_pos <= 1:
+          horn_num += 1
+        clause_len = 0
+        clause_pos = 0
+      else:
+        clause_len += 1
+        lit_num += 1
+        if lit > 0:
+          clause_pos += 1
+          pos_lit_num += 1
+  assert(clause_num > 0)
+  features = [var_num, clause_num, clause_num / max(var_num, 1), lit_num / clause_num]
+  features += [x / clause_num for x in len_hist]
+  features += [pos_lit_num / max(lit_num, 1), horn_num / clause_num]
+  return features
+
+# Standardized features, where sizes are taken in a logarithmic scale:
+def standardize(features : list):
+  rows = []
+  for f in features:
+    rows.append([math.log(1 + f[0]), math.log(1 + f[1]), math.log(1 + f[2])] + f[3:])
+  dim = len(rows[0])
+  for j in range(dim):
+    col = [r[j] for r in rows]
+    mean = sum(col) / len(col)
+    sd = math.sqrt(sum((x - mean)**2 for x in col) / len(col))
+    for r in rows:
+      r[j] = (r[j] - mean) / sd if sd > 0 else 0.0
+  return rows
+
+def sqdist(x : list, y : list):
+  return sum((a - b)**2 for a, b in zip(x, y))
+
+# k-means with k-means++ initialization, returns centroids and labels:
+def kmeans(rows : list, k : int, seed : int):
+  rnd = random.Random(seed)
+  centroids = [rows[rnd.randrange(len(rows))]]
+  while len(centroids) < k:
+    dists = [min(sqdist(r, c) for c in centroids) for r in rows]
+    if sum(dists) == 0:
+      break
+    centroids.append(rows[rnd.choices(range(len(rows)), dists, k=1)[0]])
+  labels = [-1 for _ in rows]
+  for _ in range(KMEANS_MAX_ITER):
+    new_labels = [min(range(len(centroids)), key=lambda c: sqdist(r, centroids[c])) for r in rows]
+    if new_labels == labels:
+      break
+    labels = new_labels
+    for c in range(len(centroids)):
+      members = [rows[i] for i in range(len(rows)) if labels[i] == c]
+      if len(members) > 0:
+        centroids[c] = [sum(col) / len(members) for col in zip(*members)]
+  return centroids, labels
+
+if __name__ == '__main__':
+  if len(sys.argv) < 2 or sys.argv[1] in ['-h', '--help']:
+    print_usage()
+    exit(1)
+
+  print('Running script ' + script_name + ' of version ' + version)
+  cnfs_folder_name = sys.argv[1]
+  op = Options()
+  op.read(sys.argv[2:])
+  print(op)
+
+  cnfs = sorted(read_cnfs(cnfs_folder_name))
+  assert(len(cnfs) > 0)
+  print(str(len(cnfs)) + ' CNFs were read')
+
+  with mp.Pool(op.cpu_num) as pool:
+    features = pool.map(cnf_features, cnfs)
+
+  features_file_name = 'cnf_features.csv'
+  print('Writing features to file ' + features_file_name)
+  with open(features_file_name, 'w') as f:
+    f.write('cnf,' + ','.join(feature_names) + '\n')
+    for cnf, feat in zip(cnfs, features):
+      f.write(cnf + ',' + ','.join(str(round(x, 6)) for x in feat) + '\n')
+
+  k = min(op.k, len(cnfs))
+  rows = standardize(features)
+  centroids, labels = kmeans(rows, k, op.seed)
+  chosen = []
+  for c in range(len(centroids)):
+    members = [i for i in range(len(rows)) if labels[i] == c]
+    if len(members) == 0:
+      continue
+    best = min(members, key=lambda i: sqdist(rows[i], centroids[c]))
+    chosen.append((cnfs[best], len(members)))
+
+  print(str(len(chosen)) + ' representative CNFs (cluster size) :')
+  os.makedirs(op.out_dir, exist_ok=True)
+  for cnf, size in chosen:
+    print(cnf + ' (' + str(size) + ')')
+    link_name = os.path.join(op.out_dir, os.path.basename(cnf))
+    if os.path.lexists(link_name):
+      os.remove(link_name)
+    os.symlink(os.path.abspath(cnf), link_name)
+  print('Links to the chosen CNFs are made in folder ' + op.out_dir)